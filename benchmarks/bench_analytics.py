@@ -0,0 +1,137 @@
+#!/usr/bin/env python3
+"""
+Trend computations: naive per-row loop vs. ExerciseSeries columns.
+
+Generates one exercise's synthetic history and times session bucketing,
+weekly bucketing, rolling volume, running best and PR detection with a
+plain per-row Python loop, the stdlib array backend and (if installed)
+the NumPy backend. Results are cross-checked before timing.
+
+    python benchmarks/bench_analytics.py [--sets 500000] [--repeat 5]
+"""
+
+import argparse
+import os
+import random
+import sys
+import time
+from datetime import date, datetime, timedelta
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+import fitlog_core  # noqa: E402
+
+
+def synthetic_rows(total_sets, seed=0):
+    """(iso date, weight, reps) rows in date order, as a joined SELECT would return them."""
+    rng = random.Random(seed)
+    day = date(2010, 1, 1)
+    rows = []
+    while len(rows) < total_sets:
+        day += timedelta(days=rng.randint(1, 4))
+        stamp = day.isoformat() + 'T18:00:00'
+        for _ in range(rng.randint(3, 8)):
+            rows.append((stamp, float(rng.randint(95, 405)), rng.randint(1, 12)))
+    return rows[:total_sets]
+
+
+def naive(rows, window_days):
+    """Per-row dict accumulation with a date parse per row and a backwards scan per session."""
+    sessions = {}
+    weeks = {}
+    for stamp, weight, reps in rows:
+        day = datetime.strptime(stamp[:10], '%Y-%m-%d').date()
+        volume = weight * reps
+        e1rm = weight if reps == 1 else weight * (1 + reps / 30)
+        volume_so_far, best = sessions.get(day, (0.0, 0.0))
+        sessions[day] = (volume_so_far + volume, max(best, e1rm))
+        week = day - timedelta(days=day.weekday())
+        weeks[week] = weeks.get(week, 0.0) + volume
+
+    days = sorted(sessions)
+    rolling = []
+    running_best = []
+    records = []
+    best = None
+    for i, day in enumerate(days):
+        total = 0.0
+        j = i
+        while j >= 0 and (day - days[j]).days < window_days:
+            total += sessions[days[j]][0]
+            j -= 1
+        rolling.append(total)
+        value = sessions[day][1]
+        if best is None or value > best:
+            best = value
+            records.append((day, value))
+        running_best.append(best)
+    return days, rolling, running_best, records, weeks
+
+
+def columnar(rows, use_numpy):
+    # ExerciseSeries.load gets day ordinals from SQL; here they are derived once up front
+    return fitlog_core.ExerciseSeries(
+        'bench press', 'lbs',
+        [date(int(r[0][:4]), int(r[0][5:7]), int(r[0][8:10])).toordinal() for r in rows],
+        [r[1] for r in rows], [r[2] for r in rows], use_numpy=use_numpy)
+
+
+def run_columnar(series, window_days):
+    days, rolling = series.rolling_volume(window_days)
+    _, running_best = series.running_best()
+    records = series.personal_records()
+    weeks = series.weekly()
+    return days, rolling, running_best, records, weeks
+
+
+def best_of(fn, repeat):
+    times = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        times.append(time.perf_counter() - start)
+    return min(times)
+
+
+def check(reference, result):
+    days, rolling, running_best, records, weeks = reference
+    c_days, c_rolling, c_best, c_records, (c_weeks, c_week_volume, _) = result
+    assert [d.toordinal() for d in days] == [int(d) for d in c_days]
+    assert all(abs(a - b) < 1e-6 * max(1.0, abs(a)) for a, b in zip(rolling, c_rolling))
+    assert all(abs(a - b) < 1e-9 for a, b in zip(running_best, c_best))
+    assert [d for d, _ in records] == [d for d, _ in c_records]
+    assert sorted(w.toordinal() for w in weeks) == [int(w) for w in c_weeks]
+    assert all(abs(weeks[date.fromordinal(int(w))] - v) < 1e-6 * max(1.0, v)
+               for w, v in zip(c_weeks, c_week_volume))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--sets', type=int, default=500000)
+    parser.add_argument('--window', type=int, default=fitlog_core.ROLLING_WINDOW_DAYS)
+    parser.add_argument('--repeat', type=int, default=5)
+    args = parser.parse_args()
+
+    rows = synthetic_rows(args.sets)
+    reference = naive(rows, args.window)
+    naive_time = best_of(lambda: naive(rows, args.window), args.repeat)
+    print(f"{args.sets:,} sets, {len(reference[0]):,} sessions, {args.window}-day window\n")
+    print(f"{'backend':<16} {'build':>9} {'trends':>9} {'speedup':>9}")
+    print(f"{'naive loop':<16} {'':>9} {naive_time * 1e3:>7.1f}ms {1.0:>8.1f}x")
+
+    backends = [('stdlib array', False)]
+    if fitlog_core.load_numpy() is not None:
+        backends.append(('numpy', True))
+    else:
+        print("(numpy not installed, skipping numpy backend)")
+
+    for label, use_numpy in backends:
+        build = best_of(lambda: columnar(rows, use_numpy), 1)
+        series = columnar(rows, use_numpy)
+        check(reference, run_columnar(series, args.window))
+        trend_time = best_of(lambda: run_columnar(series, args.window), args.repeat)
+        print(f"{label:<16} {build * 1e3:>7.1f}ms {trend_time * 1e3:>7.1f}ms {naive_time / trend_time:>8.1f}x")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,118 @@
+#!/usr/bin/env python3
+"""
+Per-lookup latency of connect-per-call vs. the shared Storage connection.
+
+Builds a throwaway database with a few hundred thousand sets, then times
+get_exercise_with_unit and get_existing_exercises both ways.
+
+    python benchmarks/bench_connection.py [--sets 300000] [--lookups 2000]
+"""
+
+import argparse
+import os
+import random
+import sqlite3
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+import fitlog_core  # noqa: E402
+
+EXERCISES = [('bench press', 'lbs'), ('squat', 'lbs'), ('deadlift', 'kg'),
+             ('overhead press', 'lbs'), ('barbell row', 'kg'), ('pull ups', 'reps'),
+             ('running', 'miles'), ('rowing', 'minutes'), ('plank', 'seconds'),
+             ('cycling', 'km')]
+
+
+def populate(db_path, total_sets, sets_per_exercise=4, exercises_per_workout=5):
+    rng = random.Random(0)
+    app = fitlog_core.FitLog(db_path)
+    conn = app.storage.conn
+    conn.execute('BEGIN')
+    sets_written = 0
+    workout_id = exercise_id = 0
+    while sets_written < total_sets:
+        workout_id += 1
+        conn.execute('INSERT INTO workouts (id, date) VALUES (?, ?)',
+                     (workout_id, '2020-01-01T00:00:00'))
+        for name, unit in rng.sample(EXERCISES, exercises_per_workout):
+            exercise_id += 1
+            conn.execute('INSERT INTO exercises (id, workout_id, name, unit) VALUES (?, ?, ?, ?)',
+                         (exercise_id, workout_id, name, unit))
+            conn.executemany('INSERT INTO sets (exercise_id, weight, reps, set_order) VALUES (?, ?, ?, ?)',
+                             [(exercise_id, rng.randint(45, 315), rng.randint(1, 12), i)
+                              for i in range(1, sets_per_exercise + 1)])
+            sets_written += sets_per_exercise
+    conn.executemany('INSERT OR IGNORE INTO exercise_catalog (name, unit) VALUES (?, ?)', EXERCISES)
+    conn.execute('COMMIT')
+    app.close()
+    return sets_written
+
+
+def connect_per_call_unit(db_path, name):
+    # The pre-Storage implementation: open, query, close on every lookup
+    conn = sqlite3.connect(db_path)
+    try:
+        row = conn.execute('SELECT unit FROM exercises WHERE name = ? LIMIT 1', (name,)).fetchone()
+        return row[0] if row else None
+    finally:
+        conn.close()
+
+
+def connect_per_call_names(db_path):
+    conn = sqlite3.connect(db_path)
+    try:
+        return [row[0] for row in conn.execute('SELECT DISTINCT name FROM exercises ORDER BY name')]
+    finally:
+        conn.close()
+
+
+def timed(fn, calls):
+    samples = []
+    for _ in range(calls):
+        start = time.perf_counter()
+        fn()
+        samples.append(time.perf_counter() - start)
+    samples.sort()
+    return samples[len(samples) // 2], samples[int(len(samples) * 0.99) - 1]
+
+
+def report(label, before, after):
+    print(f"{label:<28} {before[0] * 1e6:>10.1f} {before[1] * 1e6:>10.1f} "
+          f"{after[0] * 1e6:>10.1f} {after[1] * 1e6:>10.1f} {before[0] / after[0]:>8.1f}x")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--sets', type=int, default=300000)
+    parser.add_argument('--lookups', type=int, default=2000)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        db_path = os.path.join(tmp, 'fitlog.db')
+        written = populate(db_path, args.sets)
+        print(f"Database: {written} sets, {os.path.getsize(db_path) / 1e6:.1f} MB\n")
+
+        app = fitlog_core.FitLog(db_path)
+
+        # Hit (first row) and miss (full scan) lookups show connection cost vs. query cost
+        names = [n for n, _ in EXERCISES]
+        rng = random.Random(1)
+        print(f"{'operation':<28} {'before p50':>10} {'before p99':>10} "
+              f"{'after p50':>10} {'after p99':>10} {'speedup':>9}   (microseconds)")
+        report('unit lookup (hit)',
+               timed(lambda: connect_per_call_unit(db_path, rng.choice(names)), args.lookups),
+               timed(lambda: app.get_exercise_with_unit(rng.choice(names)), args.lookups))
+        report('unit lookup (miss)',
+               timed(lambda: connect_per_call_unit(db_path, 'no such exercise'), max(args.lookups // 100, 5)),
+               timed(lambda: app.get_exercise_with_unit('no such exercise'), max(args.lookups // 100, 5)))
+        report('distinct exercise names',
+               timed(lambda: connect_per_call_names(db_path), max(args.lookups // 100, 5)),
+               timed(app.get_existing_exercises, max(args.lookups // 100, 5)))
+        app.close()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,101 @@
+#!/usr/bin/env python3
+"""
+Bulk import throughput for the text, CSV and JSONL readers.
+
+Writes a synthetic paper log of the requested size in each format, then
+imports it into a fresh database and reports sets/second.
+
+    python benchmarks/bench_import.py [--sets 1000000] [--formats text csv jsonl]
+"""
+
+import argparse
+import json
+import os
+import random
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+import fitlog_core  # noqa: E402
+
+EXERCISES = [('bench press', 'lbs'), ('squat', 'lbs'), ('deadlift', 'kg'),
+             ('overhead press', 'lbs'), ('barbell row', 'kg'), ('pull ups', 'reps'),
+             ('running', 'miles'), ('rowing', 'minutes'), ('plank', 'seconds'),
+             ('cycling', 'km')]
+
+
+def synthetic_workouts(total_sets, seed=0):
+    rng = random.Random(seed)
+    day = 0
+    written = 0
+    while written < total_sets:
+        day += 1
+        date = f"{2000 + day // 365:04d}-{1 + day % 365 // 31 % 12:02d}-{1 + day % 28:02d}"
+        exercises = []
+        for name, unit in rng.sample(EXERCISES, 5):
+            if unit in fitlog_core.SINGLE_VALUE_UNITS:
+                sets = [(rng.randint(1, 60), None) for _ in range(rng.randint(1, 3))]
+            else:
+                sets = [(rng.randint(45, 315), rng.randint(1, 12)) for _ in range(rng.randint(3, 6))]
+            exercises.append((name, unit, sets))
+            written += len(sets)
+        yield date, exercises
+
+
+def write_text(path, workouts):
+    with open(path, 'w') as f:
+        for date, exercises in workouts:
+            f.write(date + '\n')
+            for name, unit, sets in exercises:
+                tokens = [f"{w}x{r}" if r else str(w) for w, r in sets]
+                f.write(f"{name} {unit} {' '.join(tokens)}\n")
+
+
+def write_csv(path, workouts):
+    with open(path, 'w') as f:
+        f.write('date,exercise,unit,weight,reps\n')
+        for date, exercises in workouts:
+            for name, unit, sets in exercises:
+                for w, r in sets:
+                    f.write(f"{date},{name},{unit},{w},{r or ''}\n")
+
+
+def write_jsonl(path, workouts):
+    with open(path, 'w') as f:
+        for date, exercises in workouts:
+            f.write(json.dumps({'date': date, 'exercises': [
+                {'name': name, 'unit': unit, 'sets': [[w, r] if r else w for w, r in sets]}
+                for name, unit, sets in exercises]}) + '\n')
+
+
+WRITERS = {'text': (write_text, '.txt'), 'csv': (write_csv, '.csv'), 'jsonl': (write_jsonl, '.jsonl')}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--sets', type=int, default=1000000)
+    parser.add_argument('--formats', nargs='+', choices=sorted(WRITERS), default=['text', 'csv', 'jsonl'])
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        for import_format in args.formats:
+            writer, extension = WRITERS[import_format]
+            source = os.path.join(tmp, 'log' + extension)
+            writer(source, synthetic_workouts(args.sets))
+
+            db_path = os.path.join(tmp, f'{import_format}.db')
+            app = fitlog_core.FitLog(db_path)
+
+            start = time.perf_counter()
+            with open(source, newline='') as handle:
+                imported, _ = app.import_workouts(fitlog_core.IMPORT_READERS[import_format](handle), progress=False)
+            elapsed = time.perf_counter() - start
+            app.close()
+            print(f"{import_format:<6} {imported:>10,} sets  {os.path.getsize(source) / 1e6:6.1f} MB  "
+                  f"{elapsed:6.2f}s  {imported / elapsed:>10,.0f} sets/s")
+
+
+if __name__ == '__main__':
+    main()
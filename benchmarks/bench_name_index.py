@@ -0,0 +1,94 @@
+#!/usr/bin/env python3
+"""
+Exercise-name completion latency: linear scan vs. ExerciseNameIndex.
+
+The linear scan mirrors what a WordCompleter over a plain list does on each
+keystroke. Times prefix completion, fuzzy suggestion and insertion on a
+synthetic catalog.
+
+    python benchmarks/bench_name_index.py [--names 50000] [--queries 2000]
+"""
+
+import argparse
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+import fitlog_core  # noqa: E402
+
+EQUIPMENT = ['barbell', 'dumbbell', 'cable', 'machine', 'kettlebell', 'band', 'smith', 'ez bar', 'bb', 'db']
+VARIATIONS = ['incline', 'decline', 'seated', 'standing', 'single arm', 'wide grip', 'close grip',
+              'paused', 'tempo', 'deficit', 'reverse', 'chest supported', 'landmine', 'banded']
+MOVEMENTS = ['bench press', 'curls', 'row', 'squat', 'deadlift', 'press', 'fly', 'lunge',
+             'extension', 'raise', 'pulldown', 'shrug', 'hip thrust', 'good morning', 'pullover']
+
+
+def synthetic_names(count, seed=0):
+    rng = random.Random(seed)
+    names = set()
+    while len(names) < count:
+        parts = [rng.choice(EQUIPMENT), rng.choice(VARIATIONS), rng.choice(MOVEMENTS)]
+        if rng.random() < 0.5:
+            parts.append(str(rng.randint(1, 999)))
+        names.add(' '.join(parts))
+    return sorted(names)
+
+
+def linear_complete(names, prefix, limit=fitlog_core.COMPLETION_LIMIT):
+    return [name for name in names if name.startswith(prefix)][:limit]
+
+
+def percentiles(fn, queries):
+    samples = []
+    for query in queries:
+        start = time.perf_counter()
+        fn(query)
+        samples.append(time.perf_counter() - start)
+    samples.sort()
+    return samples[len(samples) // 2] * 1e6, samples[int(len(samples) * 0.99) - 1] * 1e6
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--names', type=int, default=50000)
+    parser.add_argument('--queries', type=int, default=2000)
+    args = parser.parse_args()
+
+    rng = random.Random(1)
+    names = synthetic_names(args.names)
+    start = time.perf_counter()
+    index = fitlog_core.ExerciseNameIndex(names)
+    built = time.perf_counter()
+    index.suggest(names[0])
+    print(f"{len(names):,} names, sorted index built in {(built - start) * 1e3:.0f} ms, "
+          f"trigram index (first suggest) in {(time.perf_counter() - built) * 1e3:.0f} ms\n")
+
+    # Prefixes of every length as they'd arrive keystroke by keystroke
+    prefixes = []
+    for name in rng.sample(names, args.queries):
+        cut = rng.randint(1, len(name))
+        prefixes.append(name[:cut])
+    misspelled = []
+    for name in rng.sample(names, args.queries):
+        i = rng.randrange(len(name))
+        misspelled.append(name[:i] + name[i + 1:])
+
+    print(f"{'operation':<26} {'p50 us':>9} {'p99 us':>9}")
+    for label, fn, queries in [
+        ('linear prefix scan', lambda q: linear_complete(names, q), prefixes),
+        ('index prefix lookup', index.complete, prefixes),
+        ('index fuzzy suggest', index.suggest, misspelled),
+    ]:
+        p50, p99 = percentiles(fn, queries)
+        print(f"{label:<26} {p50:>9.1f} {p99:>9.1f}")
+
+    new_names = [f"new exercise {i}" for i in range(args.queries)]
+    p50, p99 = percentiles(index.add, new_names)
+    print(f"{'index sorted insert':<26} {p50:>9.1f} {p99:>9.1f}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,103 @@
+#!/usr/bin/env python3
+"""
+Row-per-set vs. packed set storage: database size and full-history scans.
+
+Generates one multi-year athlete history, copies it, converts the copy
+with set-storage packed (both copies are VACUUMed), checks that both
+read back the same sets, then times full-history reads on each: loading
+every exercise's ExerciseSeries, reading recent history for every
+exercise, rebuilding the summary tables, and scanning the sets table
+(or, when packed, the compatibility view).
+
+    python benchmarks/bench_packed_sets.py [--years 10] [--exercises 15] [--sets 5]
+"""
+
+import argparse
+import contextlib
+import io
+import os
+import shutil
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+import fitlog_core  # noqa: E402
+import generate_data  # noqa: E402
+
+
+def best_of(fn, repeat):
+    best = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    return best
+
+
+def load_all_series(app, names):
+    return sum(len(fitlog_core.ExerciseSeries.load(app.storage, name, unit, use_numpy=False)) for name, unit in names)
+
+
+def read_all_history(app, names):
+    return sum(len(app.get_history(name, 50)[2]) for name, _ in names)
+
+
+def scan_sets(app):
+    return app.storage.execute('SELECT COUNT(*), SUM(weight * reps) FROM sets').fetchone()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--years', type=float, default=10)
+    parser.add_argument('--exercises', type=int, default=15)
+    parser.add_argument('--sets', type=int, default=5)
+    parser.add_argument('--repeat', type=int, default=3)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        rows_path = os.path.join(tmp, 'rows.db')
+        packed_path = os.path.join(tmp, 'packed.db')
+        total = generate_data.generate(rows_path, 0, args.years, args.exercises, args.sets)
+        shutil.copyfile(rows_path, packed_path)
+
+        rows_app = fitlog_core.FitLog(rows_path)
+        rows_app.storage.execute('VACUUM')
+        rows_app.storage.execute('PRAGMA wal_checkpoint(TRUNCATE)')
+        packed_app = fitlog_core.FitLog(packed_path)
+        with contextlib.redirect_stdout(io.StringIO()):
+            packed_app.set_storage_command('packed')
+
+        # Measure storage reads, not result cache hits
+        rows_app.cache.max_bytes = packed_app.cache.max_bytes = 0
+        names = rows_app.storage.execute('SELECT name, unit FROM exercise_catalog').fetchall()
+        for name, unit in names:
+            assert rows_app.get_history(name, 10 ** 9) == packed_app.get_history(name, 10 ** 9), name
+        assert scan_sets(rows_app) == scan_sets(packed_app)
+
+        rows_size = os.path.getsize(rows_path)
+        packed_size = os.path.getsize(packed_path)
+        print(f"{total:,} sets over {args.years:g} years, {len(names)} exercises\n")
+        print(f"{'':<28} {'rows':>10} {'packed':>10} {'change':>8}")
+        print(f"{'database size (MB)':<28} {rows_size / 1e6:>10.2f} {packed_size / 1e6:>10.2f} "
+              f"{packed_size / rows_size - 1:>+8.0%}")
+
+        cases = [
+            ("load every series (ms)", lambda app: load_all_series(app, names)),
+            ("history, every exercise (ms)", lambda app: read_all_history(app, names)),
+            ("rebuild-stats (ms)", lambda app: fitlog_core.rebuild_stats(app.storage)),
+            ("scan sets table/view (ms)", scan_sets),
+        ]
+        for label, fn in cases:
+            rows_time = best_of(lambda: fn(rows_app), args.repeat)
+            packed_time = best_of(lambda: fn(packed_app), args.repeat)
+            print(f"{label:<28} {rows_time * 1e3:>10.1f} {packed_time * 1e3:>10.1f} "
+                  f"{packed_time / rows_time - 1:>+8.0%}")
+        rows_app.close()
+        packed_app.close()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,66 @@
+#!/usr/bin/env python3
+"""
+Roster report: in-process vs. process-pool fan-out.
+
+Generates a directory of athlete databases (or uses --dir) and times
+build_roster_report with one job and with 2, 4, ... up to --jobs worker
+processes, checking that every run merges to the same roster.
+
+    python benchmarks/bench_report.py [--users 40] [--years 2] [--jobs 8]
+"""
+
+import argparse
+import os
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+import fitlog_report  # noqa: E402
+import generate_data  # noqa: E402
+
+
+def timed_report(db_paths, jobs, repeat):
+    best = None
+    roster = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        roster = fitlog_report.build_roster_report(db_paths, jobs)
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    return best, roster
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--dir', help="existing directory of athlete databases")
+    parser.add_argument('--users', type=int, default=40)
+    parser.add_argument('--years', type=float, default=2)
+    parser.add_argument('--jobs', type=int, default=os.cpu_count() or 1, help="largest pool size to try")
+    parser.add_argument('--repeat', type=int, default=3)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        directory = args.dir
+        if directory is None:
+            directory = tmp
+            for i in range(1, args.users + 1):
+                generate_data.generate(os.path.join(tmp, f'athlete_{i:03d}.db'), i, args.years)
+        db_paths = sorted(os.path.join(directory, name) for name in os.listdir(directory)
+                          if name.endswith('.db'))
+        print(f"{len(db_paths)} athlete databases, {os.cpu_count()} cores\n")
+
+        baseline, expected = timed_report(db_paths, 1, args.repeat)
+        print(f"{'jobs':>5} {'seconds':>9} {'dbs/s':>8} {'speedup':>8}")
+        print(f"{1:>5} {baseline:>9.3f} {len(db_paths) / baseline:>8.1f} {1.0:>8.2f}")
+        jobs = 2
+        while jobs <= max(args.jobs, 2):
+            elapsed, roster = timed_report(db_paths, jobs, args.repeat)
+            assert roster == expected, f"jobs={jobs} merged a different roster"
+            print(f"{jobs:>5} {elapsed:>9.3f} {len(db_paths) / elapsed:>8.1f} {baseline / elapsed:>8.2f}")
+            jobs *= 2
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,76 @@
+#!/usr/bin/env python3
+"""
+Cold-start time of the headless subcommands.
+
+Runs each command as a fresh process against a small database and reports
+median and p90 wall time next to a bare interpreter start. Also checks that
+no headless command imports prompt_toolkit, or the modules only the server,
+sync, report, profiling and set-storage commands need.
+
+    python benchmarks/bench_startup.py [--runs 30]
+"""
+
+import argparse
+import compileall
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+REPO = os.path.normpath(os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+FITLOG = os.path.join(REPO, 'fitlog.py')
+
+COMMANDS = [
+    ('interpreter only', [sys.executable, '-c', 'pass']),
+    ('fitlog --help', [sys.executable, FITLOG, '--help']),
+    ('fitlog stats', [sys.executable, FITLOG, 'stats']),
+    ('fitlog history squat', [sys.executable, FITLOG, 'history', 'squat']),
+    ('fitlog log ...', [sys.executable, FITLOG, 'log', 'squat 225x5 225x5', 'running miles 3.1']),
+]
+
+# Modules the headless commands should never load
+UNWANTED_MODULES = ['prompt_toolkit', 'fitlog_server', 'fitlog_sync', 'fitlog_report', 'fitlog_profile',
+                    'fitlog_packed']
+
+
+def run(command, cwd):
+    start = time.perf_counter()
+    subprocess.run(command, cwd=cwd, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL, check=True)
+    return time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--runs', type=int, default=30)
+    args = parser.parse_args()
+
+    compileall.compile_dir(REPO, maxlevels=0, quiet=1)
+    with tempfile.TemporaryDirectory() as tmp:
+        # Seed a database so every command has something to read
+        subprocess.run([sys.executable, FITLOG, 'log', '--date', '2024-01-01', 'squat 225x5', 'running miles 3.1'],
+                       cwd=tmp, stdout=subprocess.DEVNULL, check=True)
+
+        for label, command in COMMANDS[2:]:
+            trace = subprocess.run([sys.executable, '-X', 'importtime'] + command[1:], cwd=tmp,
+                                   stdout=subprocess.DEVNULL, stderr=subprocess.PIPE, text=True).stderr
+            for module in UNWANTED_MODULES:
+                if f' {module}\n' in trace or f' {module}.' in trace:
+                    print(f"warning: {label} imported {module}")
+
+        samples = {label: [] for label, _ in COMMANDS}
+        # Interleave commands so machine noise affects them equally
+        for _ in range(args.runs):
+            for label, command in COMMANDS:
+                samples[label].append(run(command, tmp))
+
+        print(f"{'command':<26} {'median ms':>10} {'p90 ms':>8}")
+        for label, _ in COMMANDS:
+            times = sorted(samples[label])
+            print(f"{label:<26} {statistics.median(times) * 1e3:>10.1f} "
+                  f"{times[int(len(times) * 0.9) - 1] * 1e3:>8.1f}")
+
+
+if __name__ == '__main__':
+    main()
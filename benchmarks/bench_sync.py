@@ -0,0 +1,85 @@
+#!/usr/bin/env python3
+"""
+Delta sync cost against history size.
+
+For each history length, generates an athlete database, syncs all of it
+to an empty second database once, logs a week of new workouts on the
+first and times the incremental export-changes / apply-changes round
+trip. A full re-export (--since 0) is timed alongside for comparison; the
+incremental cost should stay flat as the history grows.
+
+    python benchmarks/bench_sync.py [--years 1 5 20] [--new-workouts 7]
+"""
+
+import argparse
+import contextlib
+import io
+import os
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+import fitlog_core  # noqa: E402
+import fitlog_sync  # noqa: E402
+import generate_data  # noqa: E402
+
+
+def timed(fn, *args):
+    start = time.perf_counter()
+    with contextlib.redirect_stderr(io.StringIO()):
+        status = fn(*args)
+    assert status == 0
+    return time.perf_counter() - start
+
+
+def log_new_workouts(app, count):
+    workouts = [(f'2099-01-{day:02d}T07:00:00', [{'name': 'bench press', 'unit': 'lbs',
+                                                  'sets': [(185.0, 5)] * 5}])
+                for day in range(1, count + 1)]
+    with app.storage.transaction():
+        app.write_workouts(workouts)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--years', type=float, nargs='+', default=[1, 5, 20])
+    parser.add_argument('--exercises', type=int, default=10)
+    parser.add_argument('--sets', type=int, default=4)
+    parser.add_argument('--new-workouts', type=int, default=7)
+    args = parser.parse_args()
+
+    print(f"{'years':>6} {'sets':>10} {'full export':>12} {'full KB':>9} "
+          f"{'delta export':>13} {'delta apply':>12} {'delta KB':>9}")
+    for years in args.years:
+        with tempfile.TemporaryDirectory() as tmp:
+            source_path = os.path.join(tmp, 'source.db')
+            total = generate_data.generate(source_path, 0, years, args.exercises, args.sets)
+            source = fitlog_core.FitLog(source_path)
+            peer = fitlog_core.FitLog(os.path.join(tmp, 'peer.db'))
+
+            full_path = os.path.join(tmp, 'full.jsonl.gz')
+            full_export = timed(fitlog_sync.export_changes_command, source, full_path)
+            timed(fitlog_sync.apply_changes_command, peer, full_path)
+            # The peer's marks travel back so the source knows what it has
+            ack_path = os.path.join(tmp, 'ack.jsonl.gz')
+            timed(fitlog_sync.export_changes_command, peer, ack_path)
+            timed(fitlog_sync.apply_changes_command, source, ack_path)
+
+            log_new_workouts(source, args.new_workouts)
+            delta_path = os.path.join(tmp, 'delta.jsonl.gz')
+            delta_export = timed(fitlog_sync.export_changes_command, source, delta_path)
+            delta_apply = timed(fitlog_sync.apply_changes_command, peer, delta_path)
+
+            count = 'SELECT COUNT(*) FROM workouts'
+            assert source.storage.execute(count).fetchone() == peer.storage.execute(count).fetchone()
+            print(f"{years:>6g} {total:>10,} {full_export * 1e3:>10.1f}ms "
+                  f"{os.path.getsize(full_path) / 1e3:>9.1f} {delta_export * 1e3:>11.1f}ms "
+                  f"{delta_apply * 1e3:>10.1f}ms {os.path.getsize(delta_path) / 1e3:>9.1f}")
+            source.close()
+            peer.close()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,172 @@
+#!/usr/bin/env python3
+"""
+Deterministic synthetic fitlog.db generator.
+
+Each athlete gets a unit system (lbs/miles or kg/km), an exercise list
+drawn from a pool covering every unit in EXERCISE_UNITS, a weekly training
+frequency and slowly progressing loads with deloads and noise. Workouts go
+through FitLog.write_workouts, so catalog and summary tables are populated
+exactly as the app would.
+
+    python benchmarks/generate_data.py fitlog.db --years 5
+    python benchmarks/generate_data.py athletes/ --users 20 --years 3 --exercises 12 --sets 4
+
+With --users 1 the output is a database file; otherwise it is a directory
+of athlete_NNN.db files. The same arguments and --seed always produce
+the same data.
+"""
+
+import argparse
+import os
+import random
+import sys
+import time
+from datetime import datetime, timedelta
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+import fitlog_core  # noqa: E402
+
+# (name, kind, starting value in lbs/miles/unit, yearly progression)
+EXERCISE_POOL = [
+    ('bench press', 'weight', 135, 0.12), ('squat', 'weight', 185, 0.15),
+    ('deadlift', 'weight', 225, 0.15), ('overhead press', 'weight', 85, 0.10),
+    ('barbell row', 'weight', 115, 0.10), ('incline bench press', 'weight', 115, 0.10),
+    ('romanian deadlift', 'weight', 155, 0.12), ('barbell curls', 'weight', 55, 0.08),
+    ('tricep extension', 'weight', 40, 0.08), ('lat pulldown', 'weight', 120, 0.10),
+    ('leg press', 'weight', 270, 0.15), ('hip thrust', 'weight', 185, 0.15),
+    ('lateral raise', 'weight', 15, 0.06), ('face pull', 'weight', 40, 0.08),
+    ('pull ups', 'reps', 6, 0.15), ('push ups', 'reps', 20, 0.10),
+    ('dips', 'reps', 8, 0.12), ('sit ups', 'reps', 25, 0.05),
+    ('running', 'distance', 3.0, 0.10), ('cycling', 'distance', 10.0, 0.10),
+    ('rowing', 'minutes', 15, 0.08), ('jump rope', 'minutes', 8, 0.08),
+    ('plank', 'seconds', 45, 0.15), ('wall sit', 'seconds', 40, 0.12),
+    ('hiking', 'hours', 1.5, 0.05),
+]
+
+KG_PER_LB = 0.45359237
+KM_PER_MILE = 1.609344
+
+
+def athlete_plan(rng, exercise_count):
+    metric = rng.random() < 0.4
+    pool = list(EXERCISE_POOL)
+    rng.shuffle(pool)
+    # About 60% lifts, the rest bodyweight, cardio and timed holds
+    lifts = [entry for entry in pool if entry[1] == 'weight']
+    others = [entry for entry in pool if entry[1] != 'weight']
+    lift_count = min(len(lifts), max(1, round(exercise_count * 0.6)))
+    chosen = lifts[:lift_count] + others[:exercise_count - lift_count]
+    chosen += lifts[lift_count:lift_count + exercise_count - len(chosen)]
+    plan = []
+    for name, kind, start, progression in chosen:
+        if kind == 'weight':
+            unit = 'kg' if metric else 'lbs'
+        elif kind == 'distance':
+            unit = 'km' if metric else 'miles'
+        else:
+            unit = kind
+        strength = rng.uniform(0.7, 1.4)
+        plan.append((name, unit, start * strength, progression * rng.uniform(0.6, 1.3)))
+    return plan, rng.choice([3, 3, 4, 4, 5])
+
+
+def session_sets(rng, unit, base, sets_per_exercise):
+    count = max(1, int(rng.gauss(sets_per_exercise, 1)))
+    sets = []
+    if unit in fitlog_core.WEIGHT_UNITS:
+        if unit == 'kg':
+            base *= KG_PER_LB
+        step = 2.5 if unit == 'kg' else 5
+        top = max(step, round(base * rng.uniform(0.95, 1.05) / step) * step)
+        for i in range(count):
+            weight = top if i >= count // 2 else max(step, top - step * (count // 2 - i))
+            sets.append((float(weight), max(1, int(rng.gauss(8 - (weight / top) * 3, 1.5)))))
+    elif unit == 'reps':
+        sets = [(float(max(1, int(rng.gauss(base, base * 0.15)))), 1) for _ in range(count)]
+    else:
+        if unit == 'km':
+            base *= KM_PER_MILE
+        value = round(max(0.1, rng.gauss(base, base * 0.1)), 1)
+        sets = [(value, 1)] if unit in ('miles', 'km', 'hours') else [(value, 1) for _ in range(max(1, count // 2))]
+    return sets
+
+
+def generate_workouts(seed, years, exercise_count, sets_per_exercise, end_date=datetime(2025, 1, 1)):
+    """Yield (iso date, exercises) for one athlete, oldest first."""
+    rng = random.Random(seed)
+    plan, days_per_week = athlete_plan(rng, exercise_count)
+    first_day = end_date - timedelta(days=int(365.25 * years))
+    rotation = 0
+    for elapsed in range((end_date - first_day).days):
+        day = first_day + timedelta(days=elapsed)
+        if rng.random() < days_per_week / 7:
+            progress = elapsed / 365.25
+            # Gradual yearly trend with a lighter week every thirteenth week
+            deload = 0.85 if elapsed // 7 % 13 == 12 else 1.0
+            per_session = min(len(plan), rng.randint(4, 6))
+            exercises = []
+            for i in range(per_session):
+                name, unit, start, progression = plan[(rotation + i) % len(plan)]
+                base = start * (1 + progression * progress) * deload
+                exercises.append({'name': name, 'unit': unit,
+                                  'sets': session_sets(rng, unit, base, sets_per_exercise)})
+            rotation += max(1, per_session // 2)
+            stamp = day.replace(hour=rng.choice([6, 7, 12, 17, 18, 19]), minute=rng.randrange(60))
+            yield stamp.isoformat(), exercises
+
+
+def open_app(db_path):
+    app = fitlog_core.FitLog(db_path)
+    return app
+
+
+def generate(db_path, seed=0, years=3, exercises=10, sets=4, batch_workouts=500):
+    """Write one athlete's history into db_path. Returns the number of sets."""
+    app = open_app(db_path)
+    written = 0
+    batch = []
+    try:
+        for workout in generate_workouts(seed, years, exercises, sets):
+            batch.append(workout)
+            if len(batch) >= batch_workouts:
+                with app.storage.transaction():
+                    written += app.write_workouts(batch)
+                batch = []
+        if batch:
+            with app.storage.transaction():
+                written += app.write_workouts(batch)
+    finally:
+        app.close()
+    return written
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('output', help="database file (--users 1) or directory of athlete databases")
+    parser.add_argument('--users', type=int, default=1)
+    parser.add_argument('--years', type=float, default=3)
+    parser.add_argument('--exercises', type=int, default=10, help="distinct exercises per athlete")
+    parser.add_argument('--sets', type=int, default=4, help="average sets per exercise per session")
+    parser.add_argument('--seed', type=int, default=0)
+    args = parser.parse_args()
+
+    if args.users == 1:
+        targets = [(args.output, args.seed)]
+    else:
+        os.makedirs(args.output, exist_ok=True)
+        targets = [(os.path.join(args.output, f'athlete_{i:03d}.db'), args.seed * 100003 + i)
+                   for i in range(1, args.users + 1)]
+
+    start = time.perf_counter()
+    total = 0
+    for db_path, seed in targets:
+        if os.path.exists(db_path):
+            parser.error(f"{db_path} already exists")
+        total += generate(db_path, seed, args.years, args.exercises, args.sets)
+    elapsed = time.perf_counter() - start
+    print(f"Generated {total:,} sets for {len(targets)} athlete(s) in {elapsed:.1f}s", file=sys.stderr)
+
+
+if __name__ == '__main__':
+    main()
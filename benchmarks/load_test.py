@@ -0,0 +1,164 @@
+#!/usr/bin/env python3
+"""
+Load test for the local API server (fitlog.py serve).
+
+Starts a server on a throwaway database (or targets --port of a running
+one), then drives it from --clients concurrent keep-alive connections
+with a mix of workout saves, exercise lookups and history reads.
+Reports requests/sec and latency percentiles overall and per endpoint.
+Run with --max-batch 1 to compare against one commit per save.
+
+    python benchmarks/load_test.py [--clients 32] [--requests 5000] [--writes 0.5]
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import random
+import socket
+import subprocess
+import sys
+import tempfile
+import time
+
+ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..')
+EXERCISES = [('bench press', 'lbs'), ('squat', 'lbs'), ('deadlift', 'kg'),
+             ('overhead press', 'lbs'), ('barbell row', 'lbs'), ('running', 'miles')]
+
+
+def percentile(sorted_values, fraction):
+    return sorted_values[min(int(len(sorted_values) * fraction), len(sorted_values) - 1)]
+
+
+def free_port():
+    with socket.socket() as sock:
+        sock.bind(('127.0.0.1', 0))
+        return sock.getsockname()[1]
+
+
+def wait_for_port(port, timeout=10):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        try:
+            socket.create_connection(('127.0.0.1', port), timeout=0.2).close()
+            return
+        except OSError:
+            time.sleep(0.05)
+    raise RuntimeError(f"server did not start on port {port}")
+
+
+def make_request(rng, write_ratio):
+    name, unit = rng.choice(EXERCISES)
+    if rng.random() < write_ratio:
+        if unit == 'miles':
+            sets = [round(rng.uniform(1, 6), 1)]
+        else:
+            sets = [[rng.randrange(95, 405, 5), rng.randint(1, 10)] for _ in range(rng.randint(3, 5))]
+        body = json.dumps({'exercises': [{'name': name, 'unit': unit, 'sets': sets}]}).encode()
+        return 'save', b'POST', b'/workouts', body
+    path = name.replace(' ', '%20')
+    if rng.random() < 0.5:
+        return 'lookup', b'GET', f'/exercises/{path}'.encode(), b''
+    return 'history', b'GET', f'/history/{path}?limit=5'.encode(), b''
+
+
+async def send(reader, writer, method, target, body):
+    """One request on a keep-alive connection. Returns the status code."""
+    writer.write(method + b' ' + target + b' HTTP/1.1\r\nHost: localhost\r\n'
+                 b'Content-Type: application/json\r\nContent-Length: '
+                 + str(len(body)).encode() + b'\r\n\r\n' + body)
+    status = int((await reader.readline()).split()[1])
+    length = 0
+    while True:
+        line = await reader.readline()
+        if line == b'\r\n':
+            break
+        if line.lower().startswith(b'content-length:'):
+            length = int(line.split(b':')[1])
+    await reader.readexactly(length)
+    return status
+
+
+async def seed_exercises(port):
+    # Log every exercise once so lookups and history reads find something from the start
+    reader, writer = await asyncio.open_connection('127.0.0.1', port)
+    exercises = [{'name': name, 'unit': unit, 'sets': [3.0] if unit == 'miles' else [[100, 5]]}
+                 for name, unit in EXERCISES]
+    await send(reader, writer, b'POST', b'/workouts', json.dumps({'exercises': exercises}).encode())
+    writer.close()
+
+
+async def client(port, requests, write_ratio, seed, latencies, failures):
+    rng = random.Random(seed)
+    reader, writer = await asyncio.open_connection('127.0.0.1', port)
+    try:
+        for _ in range(requests):
+            kind, method, target, body = make_request(rng, write_ratio)
+            start = time.perf_counter()
+            status = await send(reader, writer, method, target, body)
+            latencies.setdefault(kind, []).append(time.perf_counter() - start)
+            if status >= 400:
+                failures[kind] = failures.get(kind, 0) + 1
+    finally:
+        writer.close()
+
+
+async def run_load(port, clients, total_requests, write_ratio):
+    latencies = {}
+    failures = {}
+    per_client = max(total_requests // clients, 1)
+    await seed_exercises(port)
+    start = time.perf_counter()
+    await asyncio.gather(*(client(port, per_client, write_ratio, i, latencies, failures)
+                           for i in range(clients)))
+    return time.perf_counter() - start, latencies, failures
+
+
+def report(elapsed, latencies, failures):
+    everything = sorted(value for values in latencies.values() for value in values)
+    print(f"{len(everything):,} requests in {elapsed:.2f}s: {len(everything) / elapsed:,.0f} req/s\n")
+    print(f"{'endpoint':<10} {'requests':>9} {'failed':>7} {'p50 ms':>8} {'p99 ms':>8} {'max ms':>8}")
+    rows = sorted(latencies.items()) + [('all', everything)]
+    for kind, values in rows:
+        values = sorted(values)
+        failed = sum(failures.values()) if kind == 'all' else failures.get(kind, 0)
+        print(f"{kind:<10} {len(values):>9,} {failed:>7} {percentile(values, 0.5) * 1e3:>8.2f} "
+              f"{percentile(values, 0.99) * 1e3:>8.2f} {values[-1] * 1e3:>8.2f}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--clients', type=int, default=32, help="concurrent connections")
+    parser.add_argument('--requests', type=int, default=5000, help="total requests")
+    parser.add_argument('--writes', type=float, default=0.5, help="fraction of requests that save a workout")
+    parser.add_argument('--port', type=int, help="use a server already running on this port")
+    parser.add_argument('--max-batch', type=int, help="passed to the server this script starts")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        server = None
+        port = args.port
+        if port is None:
+            port = free_port()
+            command = [sys.executable, os.path.join(ROOT, 'fitlog.py'), '--db', os.path.join(tmp, 'load.db'),
+                       'serve', '--port', str(port)]
+            if args.max_batch:
+                command += ['--max-batch', str(args.max_batch)]
+            server = subprocess.Popen(command)
+            wait_for_port(port)
+        try:
+            loop = asyncio.new_event_loop()
+            asyncio.set_event_loop(loop)
+            elapsed, latencies, failures = loop.run_until_complete(
+                run_load(port, args.clients, args.requests, args.writes))
+            loop.close()
+        finally:
+            if server is not None:
+                server.terminate()
+                server.wait()
+        report(elapsed, latencies, failures)
+
+
+if __name__ == '__main__':
+    main()
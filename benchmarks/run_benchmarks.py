@@ -0,0 +1,188 @@
+#!/usr/bin/env python3
+"""
+Latency and throughput of FitLog's data paths on a synthetic database.
+
+Generates (or reuses) a database with generate_data.py, runs each
+operation repeatedly, and reports p50/p90/p99/max latency and ops/s.
+Results can be written as JSON and compared against an earlier run.
+
+    python benchmarks/run_benchmarks.py --years 10 --json results.json
+    python benchmarks/run_benchmarks.py --db big.db --compare results.json
+"""
+
+import argparse
+import contextlib
+import io
+import json
+import os
+import platform
+import random
+import shutil
+import sqlite3
+import subprocess
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+import fitlog_core  # noqa: E402
+import generate_data  # noqa: E402
+
+# Ops slower than this ratio at p50 versus the --compare baseline are flagged
+REGRESSION_RATIO = 1.2
+
+
+def summarise(samples):
+    samples = sorted(samples)
+
+    def pct(p):
+        return samples[min(len(samples) - 1, int(len(samples) * p))] * 1e6
+
+    total = sum(samples)
+    return {
+        'n': len(samples),
+        'p50_us': pct(0.50),
+        'p90_us': pct(0.90),
+        'p99_us': pct(0.99),
+        'max_us': samples[-1] * 1e6,
+        'ops_per_s': len(samples) / total if total else 0.0,
+    }
+
+
+def measure(fn, iterations, args_for=None):
+    # One untimed call so lazy imports and cold caches don't land in the tail
+    fn(*(args_for(0) if args_for else ()))
+    samples = []
+    for i in range(iterations):
+        call_args = args_for(i) if args_for else ()
+        start = time.perf_counter()
+        fn(*call_args)
+        samples.append(time.perf_counter() - start)
+    return summarise(samples)
+
+
+def operations(app, cached_app, rng, iterations):
+    names = app.get_existing_exercises()
+    units = {name: app.get_exercise_with_unit(name) for name in names}
+    lift = next((n for n in names if units[n] in fitlog_core.WEIGHT_UNITS), names[0])
+    quiet = contextlib.redirect_stdout(io.StringIO())
+    last_day = app.storage.execute('SELECT MAX(day) FROM workouts').fetchone()[0]
+
+    def history(name):
+        with quiet:
+            app.history_command(name)
+
+    def trends(name):
+        series = fitlog_core.ExerciseSeries.load(app.storage, name, units[name])
+        series.rolling_volume()
+        series.personal_records()
+
+    def cached_trends(name):
+        cached_app.get_exercise_trends(name, units[name])
+
+    def save(i):
+        return ([{'name': lift, 'unit': units[lift], 'sets': [(100.0 + i % 50, 5)] * 4}],)
+
+    return [
+        ('get_exercise_with_unit (hit)', app.get_exercise_with_unit, iterations,
+         lambda i: (rng.choice(names),)),
+        ('get_exercise_with_unit (miss)', app.get_exercise_with_unit, iterations,
+         lambda i: (f'no such exercise {i}',)),
+        ('get_existing_exercises', app.get_existing_exercises, iterations, None),
+        ('get_exercise_stats', app.get_exercise_stats, iterations, None),
+        ('get_weekly_volume', app.get_weekly_volume, iterations, lambda i: (rng.choice(names),)),
+        ('get_rollups (12 months)', app.get_rollups, iterations,
+         lambda i: (rng.choice(names), 'month', last_day - 365, last_day)),
+        ('history (10 sessions)', history, max(iterations // 10, 10), lambda i: (rng.choice(names),)),
+        ('trend analytics', trends, max(iterations // 100, 5), lambda i: (lift,)),
+        ('trend analytics (cached)', cached_trends, iterations, lambda i: (lift,)),
+        ('get_history (cached)', cached_app.get_history, iterations, lambda i: (lift, 10)),
+        ('save_workout_to_db', app.save_workout_to_db, max(iterations // 10, 10), save),
+    ]
+
+
+def git_revision():
+    try:
+        return subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], cwd=os.path.dirname(__file__),
+                              capture_output=True, text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def compare(results, baseline_path):
+    with open(baseline_path) as f:
+        baseline = json.load(f)['results']
+    print(f"\nvs {baseline_path}:")
+    print(f"{'operation':<32} {'old p50':>10} {'new p50':>10} {'ratio':>7}")
+    regressions = 0
+    for name, stats in results.items():
+        if name not in baseline:
+            continue
+        ratio = stats['p50_us'] / baseline[name]['p50_us'] if baseline[name]['p50_us'] else float('inf')
+        flag = '  REGRESSION' if ratio > REGRESSION_RATIO else ''
+        regressions += bool(flag)
+        print(f"{name:<32} {baseline[name]['p50_us']:>10.1f} {stats['p50_us']:>10.1f} {ratio:>6.2f}x{flag}")
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--db', help="existing database to benchmark (copied first; default: generate one)")
+    parser.add_argument('--years', type=float, default=5)
+    parser.add_argument('--exercises', type=int, default=12)
+    parser.add_argument('--sets', type=int, default=4)
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--iterations', type=int, default=2000)
+    parser.add_argument('--json', help="write machine-readable results to this file")
+    parser.add_argument('--compare', help="earlier --json results to compare against")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        db_path = os.path.join(tmp, 'fitlog.db')
+        if args.db:
+            shutil.copyfile(args.db, db_path)
+        else:
+            generate_data.generate(db_path, args.seed, args.years, args.exercises, args.sets)
+
+        app = generate_data.open_app(db_path)
+        # Time the queries themselves; the result cache has its own (cached) rows
+        app.cache.max_bytes = 0
+        cached_app = generate_data.open_app(db_path)
+        size = app.storage.execute('SELECT COUNT(*) FROM sets').fetchone()[0]
+        print(f"{size:,} sets, {os.path.getsize(db_path) / 1e6:.1f} MB\n")
+        print(f"{'operation':<32} {'p50 us':>9} {'p90 us':>9} {'p99 us':>9} {'max us':>10} {'ops/s':>10}")
+
+        rng = random.Random(args.seed)
+        results = {}
+        for name, fn, iterations, args_for in operations(app, cached_app, rng, args.iterations):
+            stats = results[name] = measure(fn, iterations, args_for)
+            print(f"{name:<32} {stats['p50_us']:>9.1f} {stats['p90_us']:>9.1f} {stats['p99_us']:>9.1f} "
+                  f"{stats['max_us']:>10.1f} {stats['ops_per_s']:>10.0f}")
+        app.close()
+        cached_app.close()
+
+    report = {
+        'meta': {
+            'timestamp': time.strftime('%Y-%m-%dT%H:%M:%S'),
+            'git_revision': git_revision(),
+            'python': platform.python_version(),
+            'sqlite': sqlite3.sqlite_version,
+            'platform': platform.platform(),
+            'database': args.db,
+            'scale': {'years': args.years, 'exercises': args.exercises, 'sets': args.sets, 'seed': args.seed},
+            'total_sets': size,
+            'iterations': args.iterations,
+        },
+        'results': results,
+    }
+    if args.json:
+        with open(args.json, 'w') as f:
+            json.dump(report, f, indent=2)
+    if args.compare:
+        return 1 if compare(results, args.compare) else 0
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,2551 @@
+"""
+FitLog: storage, logging, analysis and the command line. fitlog.py is the
+entry point; the server, sync, roster report, profiler and set-storage
+conversion live in their own modules and are imported by the commands that
+use them.
+"""
+
+import argparse
+import marshal
+import math
+import sqlite3
+import os
+import re
+import sys
+import time
+from array import array
+from bisect import bisect_left, insort
+from collections import ChainMap, Counter, OrderedDict
+from contextlib import contextmanager
+from itertools import accumulate, chain, groupby, islice
+from struct import unpack_from
+from datetime import date, datetime
+
+# Available units for exercises
+EXERCISE_UNITS = ['lbs', 'kg', 'minutes', 'reps', 'miles', 'km', 'seconds', 'hours']
+
+# Units logged as a single value per set rather than weight x reps
+SINGLE_VALUE_UNITS = ['minutes', 'seconds', 'hours', 'miles', 'km', 'reps']
+
+# Characters stripped from exercise names before they are stored or looked up
+EXERCISE_NAME_DISALLOWED = re.compile(r'[^a-zA-Z0-9\s\-]')
+
+# Largest rep count a set can hold (packed storage keeps reps as int32)
+MAX_REPS = 2 ** 31 - 1
+
+# Paper-log set notation: "185x5" (weight x reps) or a single value such as "3.1"
+SET_TOKEN = re.compile(r'^\d+(?:\.\d+)?(?:x\d+)?$', re.IGNORECASE)
+
+# Date formats accepted by importers, all stored back as ISO strings
+DATE_PREFIX = re.compile(r'^\d{4}-\d{2}-\d{2}')
+DATE_FORMATS = ['%Y-%m-%d', '%Y-%m-%dT%H:%M', '%Y-%m-%dT%H:%M:%S', '%Y-%m-%dT%H:%M:%S.%f',
+                '%Y-%m-%d %H:%M', '%Y-%m-%d %H:%M:%S']
+
+# Main menu art, printed with a single write per redraw
+MENU_BANNER = "\n".join([
+    "⠀⠀⠀⠀⠀⠀⠀⠀⠀⠀⠀⠀⠀⠀⠀⠀⠀⠀⠀⠀⢀⣀⣀⣀⠀⠀⠀⠀⠀⠀⠀⠀⠀⠀⠀⣠⢤⡖⠺⠉⠓⠢⣄⠀⠀⠀⠀⠀⠀⠀",
+    "⠀⠀⠀⠀⠀⠀⠀⠀⠀⠀⠀⠀⠀⠀⢀⣴⢞⣿⣿⣭⣟⣯⣾⣿⣿⣿⡆⠀⠀⠀⠀⠀⠀⠀⢸⣅⠉⠀⢻⣦⠀⡀⠘⣆⠀⠀⠀⠀⠀⠀",
+    "⠀⠀⠀⠀⠀⠀⠀⠀⠀⠀⠀⠀⠀⠀⣸⣟⣿⡿⣿⣿⣿⢟⣿⣿⠟⢿⡀⠀⠀⠀⠀⠀⠀⠀⢟⣿⣾⣿⣿⣿⣇⠀⢡⠘⣆⠀⠀⠀⠀⠀",
+    "⠀⠀⠀⠀⠀⠀⠀⠀⠀⠀⠀⠀⠀⠀⣿⣿⣿⣿⣿⣶⣿⣻⡿⠁⠀⠀⢣⠀⠀⠀⠀⠀⠀⠀⠀⠙⠛⠉⠉⠁⢻⠈⡆⢳⡈⢳⡀⠀⠀⠀",
+    "⠀⠀⠀⠀⠀⠀⠀⠀⠀⠀⠀⠀⠀⠸⢿⣿⣿⣿⣿⣽⣿⡏⠀⠐⠾⣿⣿⡀⠀⠀⠀⠀⠀⠀⠀⠀⠀⠀⠀⠀⢸⡇⠟⢰⡥⠀⢝⣄⠀⠀",
+    "⠀⠀⠀⠀⠀⠀⠀⠀⠀⠀⠀⠀⠀⠀⠈⣿⣿⣿⣷⡘⠃⠀⠀⠀⠀⠙⢁⣱⡀⠀⠀⠀⠀⠀⠀⠀⠀⠀⠀⠀⢼⢣⠞⣀⢇⠈⠱⠚⣆⠀",
+    "⠀⠀⠀⠀⠀⠀⠀⠀⠀⠀⠀⠀⠀⠀⢰⣿⢿⣻⣿⣿⣿⡅⠀⠀⠀⢦⣬⡇⠀⠀⠀⠀⠀⠀⠀⢠⠚⡏⠉⠑⢺⡄⠀⠀⠙⣧⡀⠇⠀⡇",
+    "⠀⠀⠀⠀⠀⠀⠀⠀⠀⠀⠀⠀⠀⢀⡾⣷⠈⠉⠙⠛⠿⢿⣷⣦⣄⢰⣾⠖⣊⣉⡩⠍⢉⠓⠶⣿⢁⠜⢇⠁⢀⣹⣷⣤⣤⣈⣇⠀⣸⢧",
+    "⠀⠀⠀⠀⠀⠀⠀⠀⠀⠀⠀⣀⡴⢛⡇⠉⠀⠀⡀⢀⡀⠀⠀⠉⢙⡏⠁⠀⢹⣇⡀⠙⣏⠢⡌⡉⠉⣒⡷⠚⠉⠉⢻⣿⣿⣿⣵⣾⣷⣾",
+    "⠀⠀⠀⠀⠀⠀⠀⠀⢀⡤⠚⠁⢀⣼⠋⣿⡅⠀⠀⠀⠀⠈⠉⠓⣦⡨⠀⡀⠀⠀⢈⣉⡒⠒⣶⡶⠂⠉⠀⠠⣤⣴⣶⣾⣿⣿⠿⠛⠉⠁",
+    "⠀⠀⠀⠀⠀⠀⠀⣴⠋⠉⠙⠋⠉⢸⣥⡤⠜⠋⢤⣦⢤⣤⣴⡾⠟⠁⠀⠙⢒⣫⣥⣴⣶⣿⣏⠀⠉⠛⠿⢿⣿⣿⣿⡿⠋⠁⠀⠀⠀⠀",
+    "⠀⠀⠀⠀⢀⡤⠚⠙⣷⣿⣦⡀⠀⢨⡏⠀⠀⠀⠀⠀⠀⠀⣩⠀⠀⠀⠉⠉⠉⢉⡛⢻⣿⣿⣿⣷⣶⣶⣶⣶⡿⠛⠁⠀⠀⠀⠀⠀⠀⠀",
+    "⠀⠀⠀⣰⠏⢀⠀⠀⣖⠈⠁⠉⠙⢻⣷⣄⣀⣤⣤⡴⠿⣿⣿⡆⠀⠀⠀⠀⠀⠀⠀⠀⠈⢻⣿⣿⣿⠛⠉⠁⠀⠀⠀⠀⠀⠀⠀⠀⠀⠀",
+    "⠀⠀⠀⡏⢰⡟⠀⠀⣿⡄⠀⠀⠀⣿⠀⠀⠀⠀⠀⢀⣴⠟⠁⢿⣄⣀⡀⠀⣀⣤⣶⣿⣿⣾⣿⣿⣿⠀⠀⠀⠀⠀⠀⠀⠀⠀⠀⠀⠀⠀",
+    "⠀⠀⣸⠀⢸⡁⠀⠀⠸⣿⣄⠀⡀⣿⠀⠀⡠⣶⡷⠋⡀⠀⠀⠚⠛⠛⠛⠛⠛⠛⠃⠈⠑⡿⢸⣯⡝⠀⠀⠀⠀⠀⠀⠀⠀⠀⠀⠀⠀⠀",
+    "⠀⢠⠇⠀⠘⣿⣦⣤⣤⣿⡟⠛⠓⢿⣞⠻⠟⣔⠲⡇⣀⡀⠀⠀⠀⠀⠀⠀⠀⠐⠀⠀⢠⣾⣺⠟⠀⠀⠀⠀⠀⠀⠀⠀⠀⠀⠀⠀⠀⠀",
+    "⠀⢸⠀⠀⠀⣿⣿⠉⠛⠿⢦⣄⡠⠘⡆⣀⣤⠀⠀⠀⢐⣮⠗⠃⠋⠛⠛⠛⠛⠛⢻⣿⡿⡍⠃⠀⠀⠀⠀⠀⠀⠀⠀⠀⠀⠀⠀⠀⠀⠀",
+    "⠀⣼⠀⠀⠀⢸⣿⠀⠀⠀⠀⠀⠭⠌⣧⢾⣧⣤⣾⣦⠥⢠⣀⣀⢄⣠⣦⣶⣾⣿⣿⣿⠇⠀⠀⠀⠀⠀⠀⠀⠀⠀⠀⠀⠀⠀⠀⠀⠀⠀",
+    "⠀⣿⠀⣀⣴⣿⣿⣿⣿⣦⡂⠀⠀⠀⣾⣙⡇⠀⠀⠀⠀⠀⠀⠁⠀⣡⣿⣿⣿⣿⣯⣿⠀⠀⠀⠀⠀⠀⠀⠀⠀⠀⠀⠀⠀⠀⠀⠀⠀⠀",
+    "⠀⣿⡿⢋⣡⣾⣿⣿⣟⣻⠿⣿⠷⣤⣿⣿⣇⠀⠀⠀⠀⠀⠠⣀⣿⣿⣿⠛⠛⠻⠏⣿⠀⠀⠀⠀⠀⠀⠀⠀⠀⠀⠀⠀⠀⠀⠀⠀⠀⠀",
+    "⢰⡟⣻⣿⣿⣿⣿⣿⣼⡏⠀⠈⠑⢤⣹⡿⣿⣯⠻⢿⣿⣿⣿⣽⠿⢟⣃⣀⣀⡨⣏⣿⠀⠀⠀⠀⠀⠀⠀⠀⠀⠀⠀⠀⠀⠀⠀⠀⠀⠀",
+    "⣾⣾⠁⠀⠈⢹⣿⣿⠟⠀⠀⠀⠀⠀⠈⠛⢾⣿⡆⣶⣿⣿⠗⠒⢉⣉⣉⣙⣛⢿⣧⡿⠀⠀⠀⠀⠀⠀⠀⠀⠀⠀⠀⠀⠀⠀⠀⠀⠀⠀",
+    "⢹⣿⠀⠀⢷⡀⢻⡇⠀⠀⠀⠀⠀⠀⠀⠀⠀⠙⣷⣿⣿⣷⣿⣿⣿⣿⣿⣟⣿⣿⣿⣿⣇⠀⠀⠀⠀⠀⠀⠀⠀⠀⠀⠀⠀⠀⠀⠀⠀⠀",
+    "⠈⠿⣄⠀⣸⣿⣄⣻⡀⠀⠀⠀⠀⠀⠀⠀⠀⠀⣏⣉⣉⣉⣉⣉⣿⣏⣉⣉⣉⣉⣉⣉⣙⣦⠀⠀⠀⠀⠀⠀⠀⠀⠀⠀⠀⠀⠀⠀⠀⠀",
+    "⠀⠀⠀⠙⢷⣌⠧⠈⡇⠀⠀⠀⠀⠀⠀⠀⠀⢠⡟⣟⣏⣿⣷⡇⢸⣿⣿⣿⣿⣿⠆⣿⠀⠿⡇⠀⠀⠀⠀⠀⠀⠀⠀⠀⠀⠀⠀⠀⠀⠀",
+    "",
+    "███████╗██╗████████╗    ██╗      ██████╗  ██████╗ ",
+    "██╔════╝██║╚══██╔══╝    ██║     ██╔═══██╗██╔════╝ ",
+    "█████╗  ██║   ██║       ██║     ██║   ██║██║  ███╗",
+    "██╔══╝  ██║   ██║       ██║     ██║   ██║██║   ██║",
+    "██║     ██║   ██║       ███████╗╚██████╔╝╚██████╔╝",
+    "╚═╝     ╚═╝   ╚═╝       ╚══════╝ ╚═════╝  ╚═════╝ ",
+    "",
+])
+
+# Invalid import records reported individually before only counting the rest
+IMPORT_ERRORS_SHOWN = 10
+
+# Exercise-name completion: most names offered per keystroke, and the trigram
+# similarity (Dice coefficient) a name needs to be suggested as a near-duplicate
+COMPLETION_LIMIT = 20
+FUZZY_THRESHOLD = 0.45
+
+# Connection tuning applied once when the shared connection is opened
+SQLITE_PRAGMAS = [
+    ('journal_mode', 'WAL'),
+    ('synchronous', 'NORMAL'),
+    ('cache_size', -16384),      # negative = KiB, so 16 MiB of page cache
+    ('mmap_size', 268435456),    # 256 MiB memory-mapped reads
+]
+
+# Number of prepared statements sqlite3 keeps compiled per connection
+STATEMENT_CACHE_SIZE = 256
+
+# Profiling: SQLite VM instructions between progress callbacks, and the
+# environment variables that switch profiling on without --profile
+PROFILE_VM_STEP = 100
+PROFILE_ENV = 'FITLOG_PROFILE'
+PROFILE_JSON_ENV = 'FITLOG_PROFILE_JSON'
+
+# Roster reports: athlete databases a worker process handles before it is
+# replaced (keeps worker memory bounded), and rows in the leaderboard
+REPORT_TASKS_PER_CHILD = 50
+REPORT_RECENT_DAYS = 28
+REPORT_TOP_EXERCISES = 15
+
+# Local API server (serve command): bind address, SQLite reader threads,
+# most workouts coalesced into one commit, and the request body cap
+SERVER_HOST = '127.0.0.1'
+SERVER_PORT = 8765
+SERVER_READ_THREADS = 4
+SERVER_MAX_BATCH = 256
+SERVER_MAX_BODY = 1 << 20
+HTTP_REASONS = {200: 'OK', 201: 'Created', 400: 'Bad Request', 404: 'Not Found',
+                405: 'Method Not Allowed', 409: 'Conflict', 413: 'Payload Too Large', 500: 'Internal Server Error'}
+
+# Units whose sets are weight x reps and get an estimated one-rep max
+WEIGHT_UNITS = ['lbs', 'kg']
+
+# Canonical unit and factor for each unit: value * factor is the value in kg, km,
+# seconds or reps. Stored per set as sets.canonical_weight so aggregates can mix
+# units in plain SQL; mirrored in the unit_conversions table.
+UNIT_CONVERSIONS = {
+    'lbs': ('kg', 0.45359237),
+    'kg': ('kg', 1.0),
+    'miles': ('km', 1.609344),
+    'km': ('km', 1.0),
+    'seconds': ('seconds', 1.0),
+    'minutes': ('seconds', 60.0),
+    'hours': ('seconds', 3600.0),
+    'reps': ('reps', 1.0),
+}
+
+# Sets read per chunk when summary tables are rebuilt from history
+REBUILD_CHUNK_SETS = 100000
+
+# Packed set storage (set-storage packed): bytes per set in exercises.packed_sets
+# (float64 weight + int32 reps), and the most sets one exercise row can hold
+PACKED_SET_SIZE = 12
+PACKED_MAX_SETS = 1024
+
+# Sessions fetched per query, and shown per page, by the history viewer
+HISTORY_PAGE_SIZE = 10
+
+# Buckets the progress command shows when no --since date is given
+PROGRESS_BUCKETS = 12
+ROLLUP_PERIODS = ['day', 'week', 'month']
+
+# Exercise rows read per chunk when streaming packed sets
+PACKED_CHUNK_EXERCISES = REBUILD_CHUNK_SETS // 8
+
+# Shape of the sets table in row storage; packed storage replaces it with a view
+SETS_TABLE_SQL = '''
+    CREATE TABLE IF NOT EXISTS sets (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        exercise_id INTEGER,
+        weight REAL,
+        reps INTEGER,
+        set_order INTEGER,
+        canonical_weight REAL,
+        FOREIGN KEY (exercise_id) REFERENCES exercises (id)
+    )
+'''
+SETS_VIEW_SQL = f'''
+    CREATE VIEW sets AS
+    SELECT e.id * {PACKED_MAX_SETS} + slot.n AS id, e.id AS exercise_id,
+           packed_weight(e.packed_sets, slot.n) AS weight, packed_reps(e.packed_sets, slot.n) AS reps,
+           slot.n + 1 AS set_order, packed_weight(e.packed_sets, slot.n) * c.factor AS canonical_weight
+    FROM exercises e
+    JOIN set_slots slot ON slot.n < length(e.packed_sets) / {PACKED_SET_SIZE}
+    LEFT JOIN unit_conversions c ON c.unit = COALESCE(e.unit, 'lbs')
+'''
+
+# Trailing window, in days, for rolling volume on the trends view
+ROLLING_WINDOW_DAYS = 28
+
+# julianday() of 0000-12-31, so julianday(date) - JULIAN_DAY_OFFSET == date.toordinal()
+JULIAN_DAY_OFFSET = 1721424.5
+
+# Delta sync: random bytes in a database's node id, workouts per export/apply
+# chunk, and the format named in a change file's header line
+SYNC_NODE_ID_BYTES = 8
+SYNC_CHUNK_WORKOUTS = 500
+SYNC_FORMAT = 'fitlog-changes'
+SYNC_FORMAT_VERSION = 1
+
+# Memory cap, in marshalled bytes, for cached analysis results
+RESULT_CACHE_BYTES = 16 << 20
+
+
+def clean_exercise_name(name):
+    return EXERCISE_NAME_DISALLOWED.sub('', name).lower().strip()
+
+
+def parse_unit(text):
+    """
+    Return the unit from EXERCISE_UNITS matching text (case-insensitive),
+    or None if it is not a known unit.
+    """
+    unit = text.strip().lower()
+    return unit if unit in EXERCISE_UNITS else None
+
+
+def parse_set_value(unit, text):
+    """
+    Parse one set as typed for the given unit: a single number for
+    SINGLE_VALUE_UNITS, otherwise "Weight Reps".
+    Returns tuple (value, reps); raises ValueError on malformed input,
+    including nan and inf, which float() accepts but no total can hold.
+    """
+    if unit in SINGLE_VALUE_UNITS:
+        value, reps = float(text), 1
+    else:
+        parts = text.split()
+        if len(parts) != 2:
+            raise ValueError("expected 'Weight Reps'")
+        value, reps = float(parts[0]), int(parts[1])
+    if not math.isfinite(value):
+        raise ValueError(f"not a finite number: {value}")
+    if not 0 <= reps <= MAX_REPS:
+        raise ValueError(f"reps must be between 0 and {MAX_REPS}")
+    return (value, reps)
+
+
+def parse_date(text):
+    """
+    Parse an ISO-style date or date-time into the ISO string stored in
+    workouts.date. Raises ValueError if no accepted format matches.
+    """
+    text = text.strip()
+    if DATE_PREFIX.match(text):
+        for date_format in DATE_FORMATS:
+            try:
+                return datetime.strptime(text, date_format).isoformat()
+            except ValueError:
+                pass
+    raise ValueError(f"unrecognised date {text!r}")
+
+
+def parse_set_notation(line):
+    """
+    Split paper-log notation such as "bench press 185x5 185x5 205x3" or
+    "running miles 3.1" into (name, unit or None, set texts). Sets are the
+    trailing numeric tokens; a unit may precede them. Set texts are in the
+    form parse_set_value expects.
+    """
+    tokens = line.split()
+    split = len(tokens)
+    while split > 0 and SET_TOKEN.match(tokens[split - 1]):
+        split -= 1
+    name_tokens = tokens[:split]
+    unit = None
+    if len(name_tokens) > 1 and parse_unit(name_tokens[-1]):
+        unit = name_tokens.pop()
+    set_texts = [token.lower().replace('x', ' ') for token in tokens[split:]]
+    return ' '.join(name_tokens), unit, set_texts
+
+
+def default_import_unit(set_texts):
+    # New exercises default to 'reps' like get_exercise_unit, unless sets carry weight and reps
+    return 'lbs' if any(' ' in text for text in set_texts) else 'reps'
+
+
+def iter_text_workouts(lines):
+    """
+    Read paper-log notation: a date line starts a workout and each following
+    line is one exercise with its sets. '#' starts a comment.
+
+        2024-01-05
+        bench press 185x5 185x5 205x3
+        running miles 3.1
+
+    Yields (line_number, date, [(name, unit, set_texts), ...]).
+    """
+    workout_date = None
+    workout_line = 0
+    exercises = []
+    for line_number, line in enumerate(lines, 1):
+        line = line.split('#', 1)[0].strip()
+        if not line:
+            continue
+        if DATE_PREFIX.match(line):
+            if exercises:
+                yield workout_line, workout_date, exercises
+            workout_date = parse_date(line)
+            workout_line = line_number
+            exercises = []
+        elif workout_date is None:
+            raise ValueError(f"line {line_number}: exercise before any date line")
+        else:
+            exercises.append(parse_set_notation(line))
+    if exercises:
+        yield workout_line, workout_date, exercises
+
+
+def iter_csv_workouts(lines):
+    """
+    Read CSV rows with a header of date, exercise, unit, weight, reps (unit
+    and reps optional; leave reps blank for single-value units). Consecutive
+    rows with the same date form one workout, and consecutive rows for the
+    same exercise form its sets.
+    Yields (line_number, date, [(name, unit, set_texts), ...]).
+    """
+    import csv
+    
+    reader = csv.DictReader(lines)
+    missing = {'date', 'exercise', 'weight'} - set(reader.fieldnames or [])
+    if missing:
+        raise ValueError(f"CSV header is missing: {', '.join(sorted(missing))}")
+    
+    raw_date = None
+    workout_date = None
+    workout_line = 0
+    exercises = []
+    for row in reader:
+        if row['date'] != raw_date:
+            if exercises:
+                yield workout_line, workout_date, exercises
+            raw_date = row['date']
+            try:
+                workout_date = parse_date(raw_date or '')
+            except ValueError as e:
+                raise ValueError(f"line {reader.line_num}: {e}")
+            workout_line = reader.line_num
+            exercises = []
+        
+        name = row['exercise'] or ''
+        unit = row.get('unit') or None
+        reps = (row.get('reps') or '').strip()
+        set_text = f"{row['weight']} {reps}" if reps else (row['weight'] or '')
+        if exercises and exercises[-1][0] == name and exercises[-1][1] == unit:
+            exercises[-1][2].append(set_text)
+        else:
+            exercises.append((name, unit, [set_text]))
+    if exercises:
+        yield workout_line, workout_date, exercises
+
+
+def iter_jsonl_workouts(lines):
+    """
+    Read one workout per line:
+    {"date": "2024-01-05", "exercises": [{"name": "squat", "unit": "lbs", "sets": [[225, 5], ...]}]}
+    Sets are [weight, reps] pairs or single numbers for single-value units.
+    Yields (line_number, date, [(name, unit, set_texts), ...]).
+    """
+    import json
+    
+    for line_number, line in enumerate(lines, 1):
+        if not line.strip():
+            continue
+        try:
+            workout_date, exercises = parse_workout_record(json.loads(line))
+        except (ValueError, KeyError, TypeError, AttributeError) as e:
+            raise ValueError(f"line {line_number}: invalid workout record ({e})")
+        yield line_number, workout_date, exercises
+
+
+def parse_workout_record(record, default_date=None):
+    """
+    Convert one decoded JSON workout (a JSONL import line or an API request
+    body) into (date, [(name, unit, set_texts), ...]). The date may only be
+    omitted when default_date is given. Malformed records raise ValueError,
+    KeyError, TypeError or AttributeError.
+    """
+    if default_date is not None and record.get('date') is None:
+        workout_date = default_date
+    else:
+        workout_date = parse_date(str(record['date']))
+    exercises = [(str(exercise.get('name', '')), exercise.get('unit'),
+                  [' '.join(str(value) for value in s) if isinstance(s, list) else str(s)
+                   for s in exercise.get('sets', [])])
+                 for exercise in record.get('exercises', [])]
+    return workout_date, exercises
+
+
+# Import readers by --format name, and the format assumed for each file extension
+IMPORT_READERS = {
+    'csv': iter_csv_workouts,
+    'jsonl': iter_jsonl_workouts,
+    'text': iter_text_workouts,
+}
+IMPORT_EXTENSIONS = {'.csv': 'csv', '.jsonl': 'jsonl', '.ndjson': 'jsonl'}
+
+
+def name_trigrams(name):
+    padded = f"  {name} "
+    return {padded[i:i + 3] for i in range(len(padded) - 2)}
+
+
+class ExerciseNameIndex:
+    """
+    In-memory exercise names for autocomplete: a sorted list for prefix
+    lookup by binary search, a trigram index for fuzzy near-duplicate
+    suggestions, and the alias map used to canonicalise typed names.
+    The trigram index is built on the first suggest() call.
+    """
+
+    def __init__(self, names=(), aliases=None):
+        self.names = sorted(set(names))
+        self.aliases = dict(aliases or {})
+        self._ids = None
+
+    def _build_trigrams(self):
+        # Postings hold integer ids so candidate counting runs in Counter's C loop
+        self._ids = []
+        self._gram_counts = []
+        self._postings = {}
+        for name in self.names:
+            self._index(name)
+
+    def _index(self, name):
+        grams = name_trigrams(name)
+        name_id = len(self._ids)
+        self._ids.append(name)
+        self._gram_counts.append(len(grams))
+        for gram in grams:
+            self._postings.setdefault(gram, []).append(name_id)
+
+    def __contains__(self, name):
+        i = bisect_left(self.names, name)
+        return i < len(self.names) and self.names[i] == name
+
+    def __len__(self):
+        return len(self.names)
+
+    def add(self, name):
+        if name not in self:
+            insort(self.names, name)
+            if self._ids is not None:
+                self._index(name)
+
+    def add_alias(self, alias, name):
+        self.aliases[alias] = name
+
+    def resolve(self, name):
+        """Return the canonical name for an alias, or the name unchanged."""
+        return self.aliases.get(name, name)
+
+    def complete(self, prefix, limit=COMPLETION_LIMIT):
+        """Names starting with prefix, in sorted order."""
+        matches = []
+        i = bisect_left(self.names, prefix)
+        while i < len(self.names) and len(matches) < limit and self.names[i].startswith(prefix):
+            matches.append(self.names[i])
+            i += 1
+        return matches
+
+    def suggest(self, name, limit=3, threshold=FUZZY_THRESHOLD):
+        """
+        Existing names most similar to name by trigram overlap (Dice
+        coefficient), best first, excluding name itself.
+        """
+        if self._ids is None:
+            self._build_trigrams()
+        grams = name_trigrams(name)
+        shared = Counter(chain.from_iterable(self._postings.get(gram, ()) for gram in grams))
+        scored = []
+        for name_id, count in shared.items():
+            score = 2 * count / (len(grams) + self._gram_counts[name_id])
+            if score >= threshold and self._ids[name_id] != name:
+                scored.append((-score, self._ids[name_id]))
+        scored.sort()
+        return [candidate for _, candidate in scored[:limit]]
+
+
+def make_name_completer(name_index):
+    """
+    prompt_toolkit completer offering prefix matches from an ExerciseNameIndex.
+    Fuzzy suggestions are left to the new-exercise check so every keystroke
+    stays a binary search. Raises ImportError without prompt_toolkit.
+    """
+    completion = load_prompt_toolkit().completion
+    
+    class ExerciseNameCompleter(completion.Completer):
+        def get_completions(self, document, complete_event):
+            text = document.text_before_cursor
+            for name in name_index.complete(clean_exercise_name(text)):
+                yield completion.Completion(name, start_position=-len(text))
+    
+    return ExerciseNameCompleter()
+
+
+def pack_sets(sets):
+    """
+    Encode [(weight, reps), ...] as a packed_sets blob: every weight as a
+    little-endian float64, then every rep count as an int32. Missing
+    weights are stored as NaN, which SQLite reads back as NULL.
+    """
+    if len(sets) > PACKED_MAX_SETS:
+        raise ValueError(f"at most {PACKED_MAX_SETS} sets per exercise can be packed")
+    try:
+        weights = array('d', [float('nan') if weight is None else weight for weight, _ in sets])
+        reps = array('i', [reps or 0 for _, reps in sets])
+    except OverflowError:
+        raise ValueError("reps out of range for packed storage")
+    if sys.byteorder == 'big':
+        weights.byteswap()
+        reps.byteswap()
+    return weights.tobytes() + reps.tobytes()
+
+
+def unpack_sets(blob):
+    """
+    (weights, reps) sequences for a packed_sets blob. On little-endian
+    hosts these are memoryviews over the blob itself, so nothing is copied.
+    """
+    count = len(blob) // PACKED_SET_SIZE
+    if sys.byteorder == 'little':
+        view = memoryview(blob)
+        return view[:8 * count].cast('d'), view[8 * count:].cast('i')
+    weights = array('d', blob[:8 * count])
+    reps = array('i', blob[8 * count:])
+    weights.byteswap()
+    reps.byteswap()
+    return weights, reps
+
+
+def _packed_weight(blob, index):
+    return unpack_from('<d', blob, 8 * index)[0]
+
+
+def _packed_reps(blob, index):
+    return unpack_from('<i', blob, 8 * (len(blob) // PACKED_SET_SIZE) + 4 * index)[0]
+
+
+class Storage:
+    """
+    Owns the single SQLite connection used for the life of the app.
+    Statements are issued with constant SQL text so sqlite3 reuses the
+    compiled statement from its per-connection cache instead of re-preparing.
+    """
+
+    def __init__(self, db_path, profiler=None, readonly=False):
+        self.db_path = db_path
+        # isolation_level=None: transactions are opened explicitly by transaction()
+        if readonly:
+            # mode=ro never creates the file, and query_only rejects writes
+            # (including migrations) instead of touching the owner's data
+            from urllib.request import pathname2url
+            
+            uri = 'file:' + pathname2url(os.path.abspath(db_path)) + '?mode=ro'
+            self.conn = sqlite3.connect(uri, uri=True, isolation_level=None,
+                                        cached_statements=STATEMENT_CACHE_SIZE)
+        else:
+            self.conn = sqlite3.connect(db_path, isolation_level=None,
+                                        cached_statements=STATEMENT_CACHE_SIZE)
+        self._depth = 0
+        self.readonly = readonly
+        for name, value in SQLITE_PRAGMAS:
+            if readonly and name == 'journal_mode':
+                continue
+            self.conn.execute(f'PRAGMA {name} = {value}')
+        if readonly:
+            self.conn.execute('PRAGMA query_only = ON')
+        # Decoders behind the sets view in packed storage
+        self.conn.create_function('packed_weight', 2, _packed_weight)
+        self.conn.create_function('packed_reps', 2, _packed_reps)
+        # Set by FitLog.init_db from the meta table
+        self.packed_sets = False
+        self.profiler = profiler
+        if profiler is not None:
+            profiler.attach(self.conn)
+
+    def execute(self, sql, params=()):
+        if self.profiler is not None:
+            return self.profiler.execute(self.conn, sql, params)
+        return self.conn.execute(sql, params)
+
+    def executemany(self, sql, rows):
+        if self.profiler is not None:
+            return self.profiler.executemany(self.conn, sql, rows)
+        return self.conn.executemany(sql, rows)
+
+    @contextmanager
+    def transaction(self):
+        """
+        Run the enclosed statements in one transaction. Nested calls join the
+        outermost transaction, which commits or rolls back as a whole.
+        Writable connections take the write lock up front (BEGIN IMMEDIATE):
+        a deferred transaction that reads first cannot upgrade once another
+        connection has committed, and fails at once instead of waiting out
+        busy_timeout.
+        """
+        if self._depth == 0:
+            self.execute('BEGIN' if self.readonly else 'BEGIN IMMEDIATE')
+        self._depth += 1
+        try:
+            yield self
+        except BaseException:
+            self._depth -= 1
+            if self._depth == 0:
+                self.execute('ROLLBACK')
+            raise
+        self._depth -= 1
+        if self._depth == 0:
+            self.execute('COMMIT')
+
+    def close(self):
+        self.conn.close()
+
+
+def format_set(unit, weight, reps):
+    if unit in SINGLE_VALUE_UNITS:
+        return f"{weight:g} {unit}"
+    return f"{weight:g} {unit} x {reps}"
+
+
+def day_number(iso_date):
+    """Day number (date.toordinal()) of an ISO date or date-time string."""
+    return date(int(iso_date[0:4]), int(iso_date[5:7]), int(iso_date[8:10])).toordinal()
+
+
+def rollup_starts(day):
+    """(period, first day number) of the day, week and month buckets containing a day number."""
+    # Day 1 (0001-01-01) was a Monday, so weeks start where (day - 1) % 7 == 0
+    month = date.fromordinal(day).replace(day=1).toordinal()
+    return (('day', day), ('week', day - (day - 1) % 7), ('month', month))
+
+
+def convert_unit(value, from_unit, to_unit):
+    """
+    Convert a logged value between units of the same kind, e.g. lbs to kg
+    or minutes to hours. Raises ValueError for units of different kinds.
+    """
+    from_canonical, from_factor = UNIT_CONVERSIONS[from_unit]
+    to_canonical, to_factor = UNIT_CONVERSIONS[to_unit]
+    if from_canonical != to_canonical:
+        raise ValueError(f"cannot convert {from_unit} to {to_unit}")
+    return value if from_unit == to_unit else value * from_factor / to_factor
+
+
+def convert_sets(sets, from_unit, to_unit):
+    """
+    [(weight, reps), ...] logged in from_unit, with the values converted to
+    to_unit when the two are the same kind of unit; otherwise unchanged.
+    """
+    from_kind = UNIT_CONVERSIONS.get(from_unit, (None,))[0]
+    if from_unit == to_unit or from_kind is None or from_kind != UNIT_CONVERSIONS.get(to_unit, (None,))[0]:
+        return sets
+    return [(None if weight is None else convert_unit(weight, from_unit, to_unit), reps) for weight, reps in sets]
+
+
+def set_metrics(unit, weight, reps):
+    """
+    Return (reps, volume, e1rm) for one set. Weight units count weight x reps
+    as volume and get an Epley estimated 1RM; 'reps' counts the value as reps;
+    distance and duration units sum the value and have no reps or 1RM.
+    """
+    if unit in WEIGHT_UNITS:
+        e1rm = weight if reps == 1 else weight * (1 + reps / 30)
+        return reps, weight * reps, e1rm
+    if unit == 'reps':
+        return int(weight), weight, None
+    return 0, weight, None
+
+
+class StatsDelta:
+    """
+    Totals for a batch of newly written sets, merged into exercise_stats and
+    exercise_rollups with one executemany per table.
+    """
+
+    def __init__(self):
+        self.exercises = {}
+        self.rollups = {}
+
+    def add_exercise(self, name, unit, workout_date, sets):
+        stats = self.exercises.get(name)
+        if stats is None:
+            stats = self.exercises[name] = {
+                'name': name, 'unit': unit, 'workouts': 0, 'sets': 0, 'reps': 0, 'volume': 0.0,
+                'best_weight': None, 'best_reps': None, 'best_e1rm': None,
+                'first_date': workout_date, 'last_date': workout_date,
+            }
+        
+        total_reps = 0
+        total_volume = 0.0
+        best_e1rm = None
+        for weight, reps in sets:
+            set_reps, volume, e1rm = set_metrics(unit, weight, reps)
+            total_reps += set_reps
+            total_volume += volume
+            if stats['best_weight'] is None or (weight, reps) > (stats['best_weight'], stats['best_reps']):
+                stats['best_weight'] = weight
+                stats['best_reps'] = reps
+            if e1rm is not None and (best_e1rm is None or e1rm > best_e1rm):
+                best_e1rm = e1rm
+        
+        stats['workouts'] += 1
+        stats['sets'] += len(sets)
+        stats['reps'] += total_reps
+        stats['volume'] += total_volume
+        if best_e1rm is not None and (stats['best_e1rm'] is None or best_e1rm > stats['best_e1rm']):
+            stats['best_e1rm'] = best_e1rm
+        stats['first_date'] = min(stats['first_date'], workout_date)
+        stats['last_date'] = max(stats['last_date'], workout_date)
+        
+        for period, start in rollup_starts(day_number(workout_date)):
+            key = (name, period, start)
+            bucket = self.rollups.get(key)
+            if bucket is None:
+                bucket = self.rollups[key] = {'name': name, 'period': period, 'start': start,
+                                              'sets': 0, 'reps': 0, 'volume': 0.0, 'best_e1rm': None}
+            bucket['sets'] += len(sets)
+            bucket['reps'] += total_reps
+            bucket['volume'] += total_volume
+            if best_e1rm is not None and (bucket['best_e1rm'] is None or best_e1rm > bucket['best_e1rm']):
+                bucket['best_e1rm'] = best_e1rm
+
+    def apply(self, storage):
+        storage.executemany('INSERT OR IGNORE INTO exercise_stats (name, unit) VALUES (:name, :unit)',
+                            self.exercises.values())
+        storage.executemany('''
+            UPDATE exercise_stats SET
+                workouts = workouts + :workouts,
+                total_sets = total_sets + :sets,
+                total_reps = total_reps + :reps,
+                total_volume = total_volume + :volume,
+                best_reps = CASE WHEN best_weight IS NULL OR :best_weight > best_weight
+                                   OR (:best_weight = best_weight AND :best_reps > best_reps)
+                                 THEN :best_reps ELSE best_reps END,
+                best_weight = CASE WHEN best_weight IS NULL OR :best_weight > best_weight
+                                   THEN :best_weight ELSE best_weight END,
+                best_e1rm = COALESCE(MAX(best_e1rm, :best_e1rm), best_e1rm, :best_e1rm),
+                first_date = MIN(COALESCE(first_date, :first_date), :first_date),
+                last_date = MAX(COALESCE(last_date, :last_date), :last_date)
+            WHERE name = :name
+        ''', self.exercises.values())
+        
+        storage.executemany('''
+            INSERT OR IGNORE INTO exercise_rollups (name, period, start) VALUES (:name, :period, :start)
+        ''', self.rollups.values())
+        storage.executemany('''
+            UPDATE exercise_rollups SET
+                sets = sets + :sets, reps = reps + :reps, volume = volume + :volume,
+                best_e1rm = COALESCE(MAX(best_e1rm, :best_e1rm), best_e1rm, :best_e1rm)
+            WHERE name = :name AND period = :period AND start = :start
+        ''', self.rollups.values())
+
+
+def rebuild_stats(storage):
+    """
+    Recompute exercise_stats and exercise_rollups from the full history,
+    streaming sets in chunks through the same StatsDelta used on insert.
+    Sets logged in another unit than the exercise's catalog unit are
+    converted to it. Returns the number of exercises summarised.
+    """
+    with storage.transaction():
+        storage.execute('DELETE FROM exercise_stats')
+        storage.execute('DELETE FROM exercise_rollups')
+        bump_write_version(storage)
+        
+        if storage.packed_sets:
+            # One row per exercise already carries all of its sets
+            cursor = storage.execute('''
+                SELECT e.name, COALESCE(e.unit, 'lbs'), COALESCE(c.unit, e.unit, 'lbs'), w.date, e.packed_sets
+                FROM exercises e
+                JOIN workouts w ON w.id = e.workout_id
+                LEFT JOIN exercise_catalog c ON c.name = e.name
+                WHERE e.packed_sets IS NOT NULL
+            ''')
+            while True:
+                rows = cursor.fetchmany(PACKED_CHUNK_EXERCISES)
+                if not rows:
+                    break
+                delta = StatsDelta()
+                for name, unit, stats_unit, workout_date, blob in rows:
+                    sets = convert_sets(list(zip(*unpack_sets(blob))), unit, stats_unit)
+                    delta.add_exercise(name, stats_unit, workout_date, sets)
+                delta.apply(storage)
+            return storage.execute('SELECT COUNT(*) FROM exercise_stats').fetchone()[0]
+        
+        cursor = storage.execute('''
+            SELECT e.id, e.name, COALESCE(e.unit, 'lbs'), COALESCE(c.unit, e.unit, 'lbs'), w.date, s.weight, s.reps
+            FROM exercises e
+            JOIN workouts w ON w.id = e.workout_id
+            JOIN sets s ON s.exercise_id = e.id
+            LEFT JOIN exercise_catalog c ON c.name = e.name
+            ORDER BY e.id, s.set_order
+        ''')
+        current = None
+        sets = []
+        while True:
+            delta = StatsDelta()
+            rows = cursor.fetchmany(REBUILD_CHUNK_SETS)
+            for exercise_id, name, unit, stats_unit, workout_date, weight, reps in rows:
+                if current is None or exercise_id != current[0]:
+                    if sets:
+                        delta.add_exercise(current[1], current[3], current[4], convert_sets(sets, *current[2:4]))
+                    current = (exercise_id, name, unit, stats_unit, workout_date)
+                    sets = []
+                sets.append((weight, reps))
+            # The exercise still being read carries over into the next chunk
+            if not rows and sets:
+                delta.add_exercise(current[1], current[3], current[4], convert_sets(sets, *current[2:4]))
+            delta.apply(storage)
+            if not rows:
+                break
+        return storage.execute('SELECT COUNT(*) FROM exercise_stats').fetchone()[0]
+
+
+def get_meta(storage, key, default=None):
+    row = storage.execute('SELECT value FROM meta WHERE key = ?', (key,)).fetchone()
+    return row[0] if row else default
+
+
+def set_meta(storage, key, value):
+    storage.execute('INSERT OR REPLACE INTO meta (key, value) VALUES (?, ?)', (key, value))
+
+
+def get_write_version(storage):
+    return int(get_meta(storage, 'write_version', 0))
+
+
+def bump_write_version(storage):
+    # Called by every write that can change an analysis result, inside its transaction
+    storage.execute("UPDATE meta SET value = value + 1 WHERE key = 'write_version'")
+
+
+class ResultCache:
+    """
+    LRU cache of analysis results, each stored marshalled and tagged with
+    the database's write_version when it was computed. A lookup at any
+    other version misses, so a write invalidates everything without the
+    cache having to know what changed. Entries are evicted least recently
+    used first once their total size passes max_bytes (0 turns caching
+    off). With a path, entries still current are saved on close and read
+    back by the next process.
+    """
+
+    def __init__(self, max_bytes=RESULT_CACHE_BYTES, path=None):
+        self.max_bytes = max_bytes
+        self.path = path
+        self.entries = OrderedDict()
+        self.size = 0
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key, version):
+        """Return the value cached for key at version; raises KeyError on a miss."""
+        entry = self.entries.get(key)
+        if entry is None or entry[0] != version:
+            self.misses += 1
+            raise KeyError(key)
+        self.entries.move_to_end(key)
+        self.hits += 1
+        # A fresh copy each time, so callers can't alter what is cached
+        return marshal.loads(entry[1])
+
+    def put(self, key, version, value):
+        try:
+            data = marshal.dumps(value)
+        except ValueError:
+            # Not plain data (e.g. dates); simply not cached
+            return
+        old = self.entries.pop(key, None)
+        if old is not None:
+            self.size -= len(old[1])
+        if len(data) > self.max_bytes:
+            return
+        self.entries[key] = (version, data)
+        self.size += len(data)
+        while self.size > self.max_bytes:
+            _, (_, evicted) = self.entries.popitem(last=False)
+            self.size -= len(evicted)
+
+    def load(self, database_id):
+        """Read entries saved for the same database; a missing or unreadable file is ignored."""
+        try:
+            with open(self.path, 'rb') as handle:
+                saved = marshal.load(handle)
+            if saved['database'] != database_id:
+                return
+            for key, version, data in saved['entries']:
+                self.entries[key] = (version, data)
+                self.size += len(data)
+        except (OSError, EOFError, ValueError, TypeError, KeyError):
+            self.entries.clear()
+            self.size = 0
+
+    def save(self, database_id, version):
+        """Write the entries that are still current, oldest first, replacing the file atomically."""
+        entries = [(key, entry_version, data) for key, (entry_version, data) in self.entries.items()
+                   if entry_version == version]
+        temp_path = f'{self.path}.tmp'
+        try:
+            with open(temp_path, 'wb') as handle:
+                marshal.dump({'database': database_id, 'entries': entries}, handle)
+            os.replace(temp_path, self.path)
+        except OSError as e:
+            print(f"Could not save result cache {self.path}: {e}", file=sys.stderr)
+
+
+_numpy = False
+_prompt_toolkit = False
+
+
+def load_prompt_toolkit():
+    """
+    Import prompt_toolkit once per process. Raises ImportError when it is not
+    installed; the failure is remembered so interactive loops don't retry
+    the import on every prompt.
+    """
+    global _prompt_toolkit
+    if _prompt_toolkit is False:
+        try:
+            import prompt_toolkit
+            import prompt_toolkit.completion
+            _prompt_toolkit = prompt_toolkit
+        except ImportError:
+            _prompt_toolkit = None
+    if _prompt_toolkit is None:
+        raise ImportError("prompt_toolkit is not installed")
+    return _prompt_toolkit
+
+
+def load_numpy():
+    """
+    Return the numpy module if it is installed, else None. Analytics uses it
+    when available and falls back to stdlib arrays otherwise.
+    """
+    global _numpy
+    if _numpy is False:
+        try:
+            import numpy
+            _numpy = numpy
+        except ImportError:
+            _numpy = None
+    return _numpy
+
+
+class ExerciseSeries:
+    """
+    One exercise's history held as parallel columns, one entry per set in
+    date order: day (date ordinal), weight, reps, plus the derived volume and
+    metric columns. metric is the estimated 1RM for weight units and the
+    logged value otherwise; it is what personal records are measured on.
+    
+    Trend methods work a column at a time: numpy ufuncs and reductions when
+    numpy is installed (or use_numpy=True), otherwise stdlib array/itertools.
+    """
+
+    def __init__(self, name, unit, day, weight, reps, use_numpy=None):
+        self.name = name
+        self.unit = unit
+        self.np = load_numpy() if use_numpy is None or use_numpy else None
+        if use_numpy and self.np is None:
+            raise ImportError("numpy is not installed")
+        
+        if self.np is not None:
+            np = self.np
+            self.day = np.asarray(day, dtype=np.int64)
+            self.weight = np.asarray(weight, dtype=np.float64)
+            self.reps = np.asarray(reps, dtype=np.float64)
+            if unit in WEIGHT_UNITS:
+                self.volume = self.weight * self.reps
+                self.metric = np.where(self.reps == 1, self.weight, self.weight * (1 + self.reps / 30))
+            else:
+                self.volume = self.weight
+                self.metric = self.weight
+        else:
+            self.day = array('l', day)
+            self.weight = array('d', weight)
+            self.reps = array('d', reps)
+            if unit in WEIGHT_UNITS:
+                self.volume = array('d', map(float.__mul__, self.weight, self.reps))
+                self.metric = array('d', [w if r == 1 else w * (1 + r / 30) for w, r in zip(self.weight, self.reps)])
+            else:
+                self.volume = self.weight
+                self.metric = self.weight
+
+    @classmethod
+    def load(cls, storage, name, unit, use_numpy=None):
+        """
+        Read an exercise's full history through idx_exercises_name, using the
+        stored workouts.day numbers so no dates are parsed. Sets logged in
+        another unit of the same kind (kg under an lbs exercise) are
+        converted to unit from their canonical values.
+        """
+        day = array('l')
+        weight = array('d')
+        reps = array('d')
+        if storage.packed_sets:
+            cursor = storage.execute('''
+                SELECT w.day, e.unit, e.packed_sets
+                FROM exercises e
+                JOIN workouts w ON w.id = e.workout_id
+                WHERE e.name = ? AND e.packed_sets IS NOT NULL
+                ORDER BY w.date, e.id
+            ''', (name,))
+            for row_day, row_unit, blob in cursor:
+                weights, counts = unpack_sets(blob)
+                day.extend([row_day] * len(weights))
+                if row_unit == unit or unit not in UNIT_CONVERSIONS:
+                    # Weights copy straight from the blob; no per-set Python objects
+                    weight.frombytes(memoryview(weights).cast('B'))
+                else:
+                    try:
+                        ratio = convert_unit(1.0, row_unit or 'lbs', unit)
+                    except (KeyError, ValueError):
+                        ratio = 1.0
+                    weight.extend([value * ratio for value in weights])
+                reps.extend(counts)
+            return cls(name, unit, day, weight, reps, use_numpy)
+        
+        # Only other units of the same kind need converting, e.g. kg for an lbs exercise
+        canonical, factor = UNIT_CONVERSIONS.get(unit, (None, 1.0))
+        others = [other for other, (kind, _) in UNIT_CONVERSIONS.items() if kind == canonical and other != unit]
+        cursor = storage.execute(f'''
+            SELECT w.day,
+                   CASE WHEN COALESCE(e.unit, 'lbs') IN ({', '.join('?' * len(others))})
+                        THEN s.canonical_weight / ? ELSE s.weight END,
+                   s.reps
+            FROM exercises e
+            JOIN workouts w ON w.id = e.workout_id
+            JOIN sets s ON s.exercise_id = e.id
+            WHERE e.name = ?
+            ORDER BY w.date, e.id, s.set_order
+        ''', (*others, factor, name))
+        for row_day, row_weight, row_reps in cursor:
+            day.append(row_day)
+            weight.append(row_weight)
+            reps.append(row_reps)
+        return cls(name, unit, day, weight, reps, use_numpy)
+
+    def __len__(self):
+        return len(self.day)
+
+    def _group(self, keys):
+        """
+        Collapse runs of equal (sorted) keys into (keys, summed volume, max metric).
+        """
+        if self.np is not None:
+            np = self.np
+            if not len(keys):
+                return keys, self.volume[:0], self.metric[:0]
+            starts = np.flatnonzero(np.concatenate(([True], keys[1:] != keys[:-1])))
+            return keys[starts], np.add.reduceat(self.volume, starts), np.maximum.reduceat(self.metric, starts)
+        
+        out_keys = array('l')
+        out_volume = array('d')
+        out_metric = array('d')
+        for key, volume, metric in zip(keys, self.volume, self.metric):
+            if out_keys and out_keys[-1] == key:
+                out_volume[-1] += volume
+                if metric > out_metric[-1]:
+                    out_metric[-1] = metric
+            else:
+                out_keys.append(key)
+                out_volume.append(volume)
+                out_metric.append(metric)
+        return out_keys, out_volume, out_metric
+
+    def sessions(self):
+        """Per training day: (day ordinals, volume, best metric)."""
+        return self._group(self.day)
+
+    def weekly(self):
+        """Per Monday-started week: (week start ordinals, volume, best metric)."""
+        # Ordinal 1 (0001-01-01) is a Monday, so (day - 1) % 7 is days since Monday
+        if self.np is not None:
+            weeks = self.day - (self.day - 1) % 7
+        else:
+            weeks = array('l', [day - (day - 1) % 7 for day in self.day])
+        return self._group(weeks)
+
+    def rolling_volume(self, window_days=ROLLING_WINDOW_DAYS):
+        """
+        Per session: (day ordinals, volume over the trailing window_days
+        ending that day), from prefix sums and a binary search per session.
+        """
+        days, volume, _ = self.sessions()
+        if self.np is not None:
+            np = self.np
+            prefix = np.concatenate(([0.0], np.cumsum(volume)))
+            starts = np.searchsorted(days, days - window_days + 1, side='left')
+            return days, prefix[1:] - prefix[starts]
+        
+        prefix = array('d', [0.0])
+        prefix.extend(accumulate(volume))
+        totals = array('d', [prefix[i + 1] - prefix[bisect_left(days, day - window_days + 1)]
+                             for i, day in enumerate(days)])
+        return days, totals
+
+    def running_best(self):
+        """Per session: (day ordinals, best metric to date)."""
+        days, _, metric = self.sessions()
+        if self.np is not None:
+            return days, self.np.maximum.accumulate(metric)
+        return days, array('d', accumulate(metric, max))
+
+    def personal_records(self):
+        """
+        Sessions that beat every earlier session, as a list of (date, metric).
+        The first session counts as the initial record.
+        """
+        days, _, metric = self.sessions()
+        if self.np is not None:
+            np = self.np
+            if not len(metric):
+                return []
+            previous = np.concatenate(([-np.inf], np.maximum.accumulate(metric)[:-1]))
+            hits = np.flatnonzero(metric > previous)
+            return [(date.fromordinal(int(days[i])), float(metric[i])) for i in hits]
+        
+        records = []
+        best = None
+        for day, value in zip(days, metric):
+            if best is None or value > best:
+                best = value
+                records.append((date.fromordinal(day), value))
+        return records
+
+
+def _migrate_base_tables(storage):
+    storage.execute('''
+        CREATE TABLE IF NOT EXISTS workouts (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            date TEXT NOT NULL,
+            notes TEXT
+        )
+    ''')
+    
+    storage.execute('''
+        CREATE TABLE IF NOT EXISTS exercises (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            workout_id INTEGER,
+            name TEXT NOT NULL,
+            unit TEXT DEFAULT 'lbs',
+            FOREIGN KEY (workout_id) REFERENCES workouts (id)
+        )
+    ''')
+    
+    storage.execute('''
+        CREATE TABLE IF NOT EXISTS sets (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            exercise_id INTEGER,
+            weight REAL,
+            reps INTEGER,
+            set_order INTEGER,
+            FOREIGN KEY (exercise_id) REFERENCES exercises (id)
+        )
+    ''')
+
+
+def _migrate_catalog_and_indexes(storage):
+    # One row per distinct exercise name; the unit is whichever the first logged row used
+    storage.execute('''
+        CREATE TABLE IF NOT EXISTS exercise_catalog (
+            name TEXT PRIMARY KEY,
+            unit TEXT NOT NULL
+        ) WITHOUT ROWID
+    ''')
+    storage.execute('''
+        INSERT OR IGNORE INTO exercise_catalog (name, unit)
+        SELECT name, COALESCE(unit, 'lbs') FROM exercises ORDER BY id
+    ''')
+    
+    storage.execute('CREATE INDEX IF NOT EXISTS idx_exercises_name ON exercises (name)')
+    storage.execute('CREATE INDEX IF NOT EXISTS idx_exercises_workout ON exercises (workout_id)')
+    storage.execute('CREATE INDEX IF NOT EXISTS idx_sets_exercise_order ON sets (exercise_id, set_order)')
+    storage.execute('CREATE INDEX IF NOT EXISTS idx_workouts_date ON workouts (date)')
+
+
+def _migrate_summary_tables(storage):
+    storage.execute('''
+        CREATE TABLE IF NOT EXISTS exercise_stats (
+            name TEXT PRIMARY KEY,
+            unit TEXT,
+            workouts INTEGER NOT NULL DEFAULT 0,
+            total_sets INTEGER NOT NULL DEFAULT 0,
+            total_reps INTEGER NOT NULL DEFAULT 0,
+            total_volume REAL NOT NULL DEFAULT 0,
+            best_weight REAL,
+            best_reps INTEGER,
+            best_e1rm REAL,
+            first_date TEXT,
+            last_date TEXT
+        ) WITHOUT ROWID
+    ''')
+    
+    # week is the Monday starting the week, 'YYYY-MM-DD'
+    storage.execute('''
+        CREATE TABLE IF NOT EXISTS exercise_weekly (
+            name TEXT NOT NULL,
+            week TEXT NOT NULL,
+            sets INTEGER NOT NULL DEFAULT 0,
+            reps INTEGER NOT NULL DEFAULT 0,
+            volume REAL NOT NULL DEFAULT 0,
+            PRIMARY KEY (name, week)
+        ) WITHOUT ROWID
+    ''')
+
+
+def _migrate_aliases(storage):
+    # Alternate spellings resolved to a catalog name before lookup or insert
+    storage.execute('''
+        CREATE TABLE IF NOT EXISTS exercise_aliases (
+            alias TEXT PRIMARY KEY,
+            name TEXT NOT NULL
+        ) WITHOUT ROWID
+    ''')
+
+
+def _migrate_packed_sets(storage):
+    # Key/value database settings, e.g. set_storage = 'rows' | 'packed'
+    storage.execute('''
+        CREATE TABLE IF NOT EXISTS meta (
+            key TEXT PRIMARY KEY,
+            value TEXT
+        ) WITHOUT ROWID
+    ''')
+    storage.execute('ALTER TABLE exercises ADD COLUMN packed_sets BLOB')
+    # Slot numbers the sets view joins against to expand each packed blob into rows
+    storage.execute('CREATE TABLE IF NOT EXISTS set_slots (n INTEGER PRIMARY KEY)')
+    storage.execute(f'''
+        INSERT OR IGNORE INTO set_slots (n)
+        WITH RECURSIVE slots(n) AS (SELECT 0 UNION ALL SELECT n + 1 FROM slots WHERE n + 1 < {PACKED_MAX_SETS})
+        SELECT n FROM slots
+    ''')
+
+
+def _migrate_day_numbers_and_rollups(storage):
+    # Integer day numbers (date.toordinal()) so date ranges are index range scans
+    storage.execute('ALTER TABLE workouts ADD COLUMN day INTEGER')
+    storage.execute(f'UPDATE workouts SET day = CAST(julianday(substr(date, 1, 10)) - {JULIAN_DAY_OFFSET} AS INTEGER)')
+    storage.execute('CREATE INDEX IF NOT EXISTS idx_workouts_day ON workouts (day)')
+    
+    # Per-exercise day/week/month buckets; start is the bucket's first day number
+    # and weeks start on Monday. Supersedes exercise_weekly.
+    storage.execute('''
+        CREATE TABLE IF NOT EXISTS exercise_rollups (
+            name TEXT NOT NULL,
+            period TEXT NOT NULL,
+            start INTEGER NOT NULL,
+            sets INTEGER NOT NULL DEFAULT 0,
+            reps INTEGER NOT NULL DEFAULT 0,
+            volume REAL NOT NULL DEFAULT 0,
+            best_e1rm REAL,
+            PRIMARY KEY (name, period, start)
+        ) WITHOUT ROWID
+    ''')
+    storage.execute('DROP TABLE IF EXISTS exercise_weekly')
+    rebuild_stats(storage)
+
+
+def _migrate_sync_log(storage):
+    import hashlib
+    
+    # Globally unique workout ids, so workouts logged on different databases never
+    # collide when synced. Existing workouts get a hash of their content, so two
+    # copies of one file agree on them; new workouts get random ids.
+    storage.execute('ALTER TABLE workouts ADD COLUMN uid TEXT')
+    cursor = storage.execute('''
+        SELECT w.id, w.date, e.name, e.unit, s.weight, s.reps
+        FROM workouts w
+        LEFT JOIN exercises e ON e.workout_id = w.id
+        LEFT JOIN sets s ON s.exercise_id = e.id
+        ORDER BY w.id, e.id, s.set_order
+    ''')
+    uids = []
+    seen = set()
+    for workout_id, rows in groupby(cursor, key=lambda row: row[0]):
+        digest = None
+        for _, workout_date, name, unit, weight, reps in rows:
+            if digest is None:
+                digest = hashlib.sha1(workout_date.encode())
+            digest.update(f'|{name}|{unit}|{weight}|{reps}'.encode())
+        uid = digest.hexdigest()[:32]
+        # Identical workouts within one database still need distinct ids
+        if uid in seen:
+            uid = f'{uid[:24]}{workout_id:08x}'
+        seen.add(uid)
+        uids.append((uid, workout_id))
+    storage.executemany('UPDATE workouts SET uid = ? WHERE id = ?', uids)
+    storage.execute('CREATE UNIQUE INDEX IF NOT EXISTS idx_workouts_uid ON workouts (uid)')
+    
+    # Append-only log of every workout written; seq is what peers' high-water marks
+    # count. origin is the node a synced workout arrived from (NULL if logged here).
+    storage.execute('''
+        CREATE TABLE IF NOT EXISTS change_log (
+            seq INTEGER PRIMARY KEY AUTOINCREMENT,
+            workout_id INTEGER NOT NULL,
+            origin TEXT
+        )
+    ''')
+    storage.execute('INSERT INTO change_log (workout_id) SELECT id FROM workouts ORDER BY id')
+    
+    # Per peer: the last of its changes applied here, and the last of ours it has confirmed
+    storage.execute('''
+        CREATE TABLE IF NOT EXISTS sync_peers (
+            node_id TEXT PRIMARY KEY,
+            received_seq INTEGER NOT NULL DEFAULT 0,
+            acked_seq INTEGER NOT NULL DEFAULT 0
+        ) WITHOUT ROWID
+    ''')
+    set_meta(storage, 'node_id', os.urandom(SYNC_NODE_ID_BYTES).hex())
+
+
+def _migrate_canonical_values(storage):
+    storage.execute('''
+        CREATE TABLE IF NOT EXISTS unit_conversions (
+            unit TEXT PRIMARY KEY,
+            canonical TEXT NOT NULL,
+            factor REAL NOT NULL
+        ) WITHOUT ROWID
+    ''')
+    storage.executemany('INSERT OR REPLACE INTO unit_conversions (unit, canonical, factor) VALUES (?, ?, ?)',
+                        [(unit, canonical, factor) for unit, (canonical, factor) in UNIT_CONVERSIONS.items()])
+    
+    if get_meta(storage, 'set_storage') == 'packed':
+        # Packed sets have no rows to store into; the view computes the column instead
+        storage.execute('DROP VIEW sets')
+        storage.execute(SETS_VIEW_SQL)
+        return
+    # Backfilled in one statement; missing units count as lbs, as in the catalog
+    storage.execute('ALTER TABLE sets ADD COLUMN canonical_weight REAL')
+    storage.execute('''
+        UPDATE sets SET canonical_weight = weight * (
+            SELECT c.factor FROM exercises e JOIN unit_conversions c ON c.unit = COALESCE(e.unit, 'lbs')
+            WHERE e.id = sets.exercise_id
+        )
+    ''')
+
+
+def _migrate_write_version(storage):
+    # Bumped by each write; cached analysis results are only valid at the version they were computed
+    storage.execute("INSERT OR IGNORE INTO meta (key, value) VALUES ('write_version', 0)")
+
+
+# Schema migrations in order; the database's PRAGMA user_version is the number applied
+MIGRATIONS = [
+    _migrate_base_tables,
+    _migrate_catalog_and_indexes,
+    _migrate_summary_tables,
+    _migrate_aliases,
+    _migrate_packed_sets,
+    _migrate_day_numbers_and_rollups,
+    _migrate_sync_log,
+    _migrate_canonical_values,
+    _migrate_write_version,
+]
+
+# Schema version from which exercise_stats and exercise_rollups exist
+SUMMARY_SCHEMA_VERSION = MIGRATIONS.index(_migrate_day_numbers_and_rollups) + 1
+
+
+class FitLog:
+    def __init__(self, db_path='fitlog.db', profiler=None, cache_path=None):
+        self.db_path = db_path
+        self.storage = Storage(self.db_path, profiler)
+        self.init_db()
+        self.cache = ResultCache(path=cache_path)
+        if cache_path:
+            self.cache.load(get_meta(self.storage, 'node_id'))
+    
+    def close(self):
+        if self.cache.path:
+            self.cache.save(get_meta(self.storage, 'node_id'), get_write_version(self.storage))
+        self.storage.close()
+    
+    def cached(self, key, compute):
+        """
+        Return compute(), reusing the result cached under key while the
+        database's write_version is unchanged. The version is read first, so
+        a write that lands during compute() only makes the entry stale early.
+        """
+        if not self.cache.max_bytes:
+            return compute()
+        version = get_write_version(self.storage)
+        try:
+            return self.cache.get(key, version)
+        except KeyError:
+            pass
+        value = compute()
+        self.cache.put(key, version, value)
+        return value
+    
+    @contextmanager
+    def phase(self, name):
+        """Time an interactive phase when profiling; otherwise does nothing."""
+        if self.storage.profiler is None:
+            yield
+        else:
+            with self.storage.profiler.phase(name):
+                yield
+    
+    def init_db(self):
+        """
+        Bring the database schema up to date. PRAGMA user_version records the
+        last migration applied; each pending step runs in its own transaction.
+        """
+        version = self.storage.execute('PRAGMA user_version').fetchone()[0]
+        for target, migration in enumerate(MIGRATIONS[version:], version + 1):
+            with self.storage.transaction():
+                migration(self.storage)
+                self.storage.execute(f'PRAGMA user_version = {target}')
+        self.storage.packed_sets = get_meta(self.storage, 'set_storage') == 'packed'
+    
+    def get_existing_exercises(self):
+        """
+        Retrieve all unique exercise names from the database for autocomplete.
+        Returns a list of exercise names sorted alphabetically.
+        """
+        try:
+            cursor = self.storage.execute('SELECT name FROM exercise_catalog ORDER BY name')
+            exercises = [row[0] for row in cursor.fetchall()]
+            return exercises
+        except sqlite3.Error as e:
+            print(f"Database error retrieving exercises: {e}")
+            return []
+    
+    def get_exercise_with_unit(self, exercise_name):
+        """
+        Retrieve exercise unit from database if exercise exists.
+        Returns the unit if found, None if exercise doesn't exist.
+        """
+        try:
+            cursor = self.storage.execute('SELECT unit FROM exercise_catalog WHERE name = ?', (exercise_name,))
+            result = cursor.fetchone()
+            return result[0] if result else None
+        except sqlite3.Error as e:
+            print(f"Database error retrieving exercise unit: {e}")
+            return None
+    
+    def get_aliases(self):
+        """
+        Retrieve the alias -> exercise name map.
+        """
+        try:
+            return dict(self.storage.execute('SELECT alias, name FROM exercise_aliases'))
+        except sqlite3.Error as e:
+            print(f"Database error retrieving aliases: {e}")
+            return {}
+    
+    def get_name_index(self):
+        return ExerciseNameIndex(self.get_existing_exercises(), self.get_aliases())
+    
+    def save_alias(self, alias, exercise_name):
+        """
+        Record alias as another spelling of an existing exercise.
+        Returns True if saved.
+        """
+        if alias == exercise_name:
+            print("An alias must differ from the exercise name.")
+            return False
+        if self.get_exercise_with_unit(exercise_name) is None:
+            print(f"No exercise named {exercise_name!r}.")
+            return False
+        if self.get_exercise_with_unit(alias) is not None:
+            print(f"{alias!r} is already an exercise with its own history.")
+            return False
+        try:
+            with self.storage.transaction():
+                self.storage.execute('INSERT OR REPLACE INTO exercise_aliases (alias, name) VALUES (?, ?)',
+                                     (alias, exercise_name))
+                bump_write_version(self.storage)
+            return True
+        except sqlite3.Error as e:
+            print(f"Database error saving alias: {e}")
+            return False
+    
+    def choose_similar_exercise(self, name_index, clean_name):
+        """
+        Offer existing exercises similar to a new name. Returns the chosen
+        existing name (optionally remembered as an alias), or None to keep
+        the new name.
+        """
+        suggestions = name_index.suggest(clean_name)
+        if not suggestions:
+            return None
+        
+        print("Similar existing exercises:")
+        for i, suggestion in enumerate(suggestions, 1):
+            print(f"  {i}. {suggestion}")
+        try:
+            choice = input("Use one of these? Enter number, or empty to create new: ").strip()
+            if not choice.isdigit() or not 1 <= int(choice) <= len(suggestions):
+                return None
+            
+            chosen = suggestions[int(choice) - 1]
+            remember = input(f"Always use '{chosen}' for '{clean_name}'? (y/n): ").strip().lower()
+        except KeyboardInterrupt:
+            # Keep the exercises already entered in this workout
+            print(f"\nKeeping '{clean_name}'.")
+            return None
+        if remember == 'y' and self.save_alias(clean_name, chosen):
+            name_index.add_alias(clean_name, chosen)
+        return chosen
+    
+    def get_exercise_input(self, name_index, prompt_text="Exercise Name (or empty to quit logging): "):
+        """
+        Get exercise name input with autocomplete fallback to basic input.
+        """
+        try:
+            prompt_toolkit = load_prompt_toolkit()
+            
+            exercise_name = prompt_toolkit.prompt(prompt_text, 
+                                 completer=make_name_completer(name_index)).strip()
+            return exercise_name
+        except ImportError:
+            # Fallback to basic input if prompt-toolkit not available
+            return input(prompt_text).strip()
+        except KeyboardInterrupt:
+            print("\nReturning to main menu...")
+            return None
+    
+    def get_exercise_unit(self):
+        """
+        Get unit input with autocomplete from predefined units.
+        Returns the selected unit string, or None if cancelled.
+        """
+        while True:
+            try:
+                prompt_toolkit = load_prompt_toolkit()
+                
+                unit_completer = prompt_toolkit.completion.WordCompleter(EXERCISE_UNITS, ignore_case=True)
+                unit = prompt_toolkit.prompt("Unit for this exercise: ", completer=unit_completer).strip()
+                
+                if not unit:
+                    return 'reps'  # Default to 'reps' if empty
+                elif parse_unit(unit):
+                    return parse_unit(unit)
+                else:
+                    print(f"Invalid unit. Please choose from: {', '.join(EXERCISE_UNITS)}")
+                    continue
+                    
+            except ImportError:
+                # Fallback to basic input if prompt-toolkit not available
+                print(f"Available units: {', '.join(EXERCISE_UNITS)}")
+                try:
+                    unit = input("Unit for this exercise: ").strip()
+                    
+                    if not unit:
+                        return 'reps'  # Default to 'reps' if empty
+                    elif parse_unit(unit):
+                        return parse_unit(unit)
+                    else:
+                        print(f"Invalid unit. Please choose from: {', '.join(EXERCISE_UNITS)}")
+                        continue
+                        
+                except KeyboardInterrupt:
+                    print("\nCancelled, returning to exercise input...")
+                    return None
+            except KeyboardInterrupt:
+                print("\nCancelled, returning to exercise input...")
+                return None
+
+    def get_set_input(self, unit, set_number):
+        """
+        Get set input with proper prompting based on unit type.
+        Returns tuple (value, reps) or None if cancelled/empty.
+        """
+        try:
+            # Customize prompt based on unit type
+            if unit in ['miles', 'km']:
+                prompt_text = f"Set Distance (e.g., '3.5' for 3.5 {unit}) or empty for none: "
+            elif unit in ['minutes', 'seconds', 'hours']:
+                prompt_text = f"Set Duration (e.g., '30' for 30 {unit}) or empty for none: "
+            elif unit == 'reps':
+                prompt_text = f"Set Reps (e.g., '15') or empty for none: "
+            else:
+                prompt_text = f"Set Weight and Reps (Weight Reps) or empty for none: "
+            
+            set_input = input(prompt_text).strip()
+            
+            if not set_input:
+                return None
+            
+            # Parse input based on unit type
+            return parse_set_value(unit, set_input)
+                    
+        except ValueError:
+            if unit in SINGLE_VALUE_UNITS:
+                print(f"  Invalid format. Enter a number for {unit}")
+            else:
+                print("  Invalid format. Use: Weight Reps")
+            return self.get_set_input(unit, set_number)  # Retry
+        except KeyboardInterrupt:
+            return "CANCELLED"  # Special return value to indicate cancellation
+
+    def display_workout_confirmation(self, workout_data):
+        """
+        Display workout confirmation table and get user approval.
+        Returns True if confirmed, False if cancelled.
+        """
+        print("\n" + "=" * 50)
+        print("         WORKOUT CONFIRMATION")
+        print("=" * 50)
+        
+        for exercise_data in workout_data:
+            exercise_name = exercise_data['name']
+            unit = exercise_data['unit']
+            sets = exercise_data['sets']
+            is_new = exercise_data['is_new']
+            
+            # Display exercise header
+            new_indicator = " (new)" if is_new else ""
+            print(f"\n{exercise_name.title()} ({unit}){new_indicator}")
+            print("-" * (len(exercise_name) + len(unit) + len(new_indicator) + 3))
+            
+            # Display sets
+            for i, (weight, reps) in enumerate(sets, 1):
+                if unit in SINGLE_VALUE_UNITS:
+                    print(f"  Set {i}: {weight} {unit}")
+                else:
+                    print(f"  Set {i}: {weight} {unit} x {reps}")
+        
+        print("\n" + "=" * 50)
+        
+        try:
+            confirm = input("Confirm and save workout? (y/n): ").strip().lower()
+            return confirm == 'y'
+        except KeyboardInterrupt:
+            print("\nWorkout cancelled.")
+            return False
+
+    def save_workout_to_db(self, workout_data):
+        """
+        Save the workout data to database in a single transaction.
+        """
+        try:
+            with self.storage.transaction():
+                self.write_workouts([(datetime.now().isoformat(), workout_data)])
+            return True
+            
+        except (sqlite3.Error, ValueError) as e:
+            print(f"Error saving workout: {e}")
+            return False
+    
+    def write_workouts(self, workouts, uids=None, origin=None):
+        """
+        Insert (date, exercises) pairs using one executemany per table.
+        Row ids are allocated up front so sets can reference their exercise
+        without a lastrowid round trip. Every workout gets a global uid
+        (random unless uids gives one per workout) and a change_log entry
+        tagged with origin, the peer it was synced from. Call inside
+        storage.transaction(). Returns the number of sets written.
+        
+        Units are checked again against the catalog as it is inside the
+        transaction, since another writer may have created an exercise
+        after the caller validated it. Sets in another unit of the same kind
+        are converted to the catalog unit; a unit of a different kind raises
+        ValueError and nothing is written.
+        """
+        workout_id = self._next_id('workouts')
+        exercise_id = self._next_id('exercises')
+        workout_rows = []
+        log_rows = []
+        exercise_rows = []
+        set_rows = []
+        catalog = self._catalog_units(list({exercise['name'] for _, exercises in workouts for exercise in exercises}))
+        logged = []
+        
+        packed = self.storage.packed_sets
+        set_count = 0
+        
+        for index, (workout_date, exercises) in enumerate(workouts):
+            uid = uids[index] if uids is not None else os.urandom(16).hex()
+            workout_rows.append((workout_id, workout_date, day_number(workout_date), uid))
+            log_rows.append((workout_id, origin))
+            for exercise_data in exercises:
+                name, unit, sets = exercise_data['name'], exercise_data['unit'], exercise_data['sets']
+                catalog_unit = catalog.setdefault(name, unit)
+                if unit != catalog_unit:
+                    kind = UNIT_CONVERSIONS.get(unit, (None,))[0]
+                    if kind is None or kind != UNIT_CONVERSIONS.get(catalog_unit, (None,))[0]:
+                        raise ValueError(f"{name!r} is logged in {catalog_unit}, which {unit} cannot be converted to")
+                    sets, unit = convert_sets(sets, unit, catalog_unit), catalog_unit
+                exercise_rows.append((exercise_id, workout_id, name, unit,
+                                      pack_sets(sets) if packed and sets else None))
+                logged.append((name, unit, workout_date, sets))
+                if not packed:
+                    factor = UNIT_CONVERSIONS[unit][1]
+                    for set_order, (weight, reps) in enumerate(sets, 1):
+                        set_rows.append((exercise_id, weight, reps, set_order, weight * factor))
+                set_count += len(sets)
+                exercise_id += 1
+            workout_id += 1
+        
+        self.storage.executemany('INSERT INTO workouts (id, date, day, uid) VALUES (?, ?, ?, ?)', workout_rows)
+        self.storage.executemany('INSERT INTO change_log (workout_id, origin) VALUES (?, ?)', log_rows)
+        self.storage.executemany(
+            'INSERT INTO exercises (id, workout_id, name, unit, packed_sets) VALUES (?, ?, ?, ?, ?)', exercise_rows)
+        if set_rows:
+            self.storage.executemany(
+                'INSERT INTO sets (exercise_id, weight, reps, set_order, canonical_weight) VALUES (?, ?, ?, ?, ?)',
+                set_rows)
+        self.storage.executemany('INSERT OR IGNORE INTO exercise_catalog (name, unit) VALUES (?, ?)',
+                                 catalog.items())
+        
+        stats = StatsDelta()
+        for name, unit, workout_date, sets in logged:
+            stats.add_exercise(name, unit, workout_date, sets)
+        stats.apply(self.storage)
+        bump_write_version(self.storage)
+        return set_count
+    
+    def _catalog_units(self, names, chunk_size=500):
+        units = {}
+        for start in range(0, len(names), chunk_size):
+            chunk = names[start:start + chunk_size]
+            units.update(self.storage.execute(
+                f'SELECT name, unit FROM exercise_catalog WHERE name IN ({", ".join("?" * len(chunk))})', chunk))
+        return units
+    
+    def _next_id(self, table):
+        # AUTOINCREMENT never reuses ids, so start past both the sequence and the current max
+        row = self.storage.execute('SELECT seq FROM sqlite_sequence WHERE name = ?', (table,)).fetchone()
+        top = self.storage.execute(f'SELECT MAX(id) FROM {table}').fetchone()[0]
+        return max(row[0] if row else 0, top or 0) + 1
+    
+    def import_workouts(self, records, batch_size=50000, progress=True):
+        """
+        Import (date, exercises) records from one of the iter_*_workouts
+        readers. Names and units go through the same cleaning, alias
+        resolution and validation as log_workout; records that fail are
+        reported and skipped. Workouts
+        are written in transactions of roughly batch_size sets.
+        Returns (sets_imported, records_skipped).
+        """
+        catalog = dict(self.storage.execute('SELECT name, unit FROM exercise_catalog'))
+        aliases = dict(self.storage.execute('SELECT alias, name FROM exercise_aliases'))
+        batch = []
+        batch_sets = 0
+        imported = 0
+        skipped = 0
+        start = time.perf_counter()
+        
+        def flush():
+            with self.storage.transaction():
+                return self.write_workouts(batch)
+        
+        for line_number, workout_date, raw_exercises in records:
+            # Units first seen in this record stay local until the whole record validates
+            record_catalog = ChainMap({}, catalog)
+            try:
+                exercises = [self._resolve_import_exercise(record_catalog, aliases, *raw) for raw in raw_exercises]
+            except ValueError as e:
+                skipped += 1
+                if skipped <= IMPORT_ERRORS_SHOWN:
+                    print(f"\nLine {line_number}: {e}, skipped", file=sys.stderr)
+                continue
+            
+            if not exercises:
+                continue
+            for exercise in exercises:
+                catalog.setdefault(exercise['name'], exercise['unit'])
+            batch.append((workout_date, exercises))
+            batch_sets += sum(len(exercise['sets']) for exercise in exercises)
+            
+            if batch_sets >= batch_size:
+                imported += flush()
+                batch = []
+                batch_sets = 0
+                if progress:
+                    elapsed = time.perf_counter() - start
+                    print(f"\rImported {imported:,} sets ({imported / elapsed:,.0f} sets/s)",
+                          end='', file=sys.stderr, flush=True)
+        
+        if batch:
+            imported += flush()
+        if progress:
+            elapsed = time.perf_counter() - start
+            print(f"\rImported {imported:,} sets in {elapsed:.1f}s "
+                  f"({imported / max(elapsed, 1e-9):,.0f} sets/s)", file=sys.stderr)
+        if skipped > IMPORT_ERRORS_SHOWN:
+            print(f"{skipped - IMPORT_ERRORS_SHOWN} more invalid records skipped", file=sys.stderr)
+        return imported, skipped
+    
+    def import_file(self, path, import_format=None, batch_size=50000):
+        """
+        Stream a CSV, JSONL or plain-text log into the database. The format is
+        taken from the file extension unless given; '-' reads stdin.
+        Returns True if every record was imported.
+        """
+        if import_format is None:
+            import_format = IMPORT_EXTENSIONS.get(os.path.splitext(path)[1].lower(), 'text')
+        reader = IMPORT_READERS[import_format]
+        
+        try:
+            handle = sys.stdin if path == '-' else open(path, newline='', encoding='utf-8')
+        except OSError as e:
+            print(f"Cannot open {path}: {e}", file=sys.stderr)
+            return False
+        
+        try:
+            with handle:
+                imported, skipped = self.import_workouts(reader(handle), batch_size)
+        except ValueError as e:
+            # Batches committed before the malformed line are kept
+            print(f"\nImport stopped, {e}", file=sys.stderr)
+            return False
+        except sqlite3.Error as e:
+            print(f"\nDatabase error during import: {e}", file=sys.stderr)
+            return False
+        return skipped == 0
+    
+    def _resolve_import_exercise(self, catalog, aliases, name, unit, set_texts):
+        clean_name = clean_exercise_name(name)
+        if not clean_name:
+            raise ValueError(f"empty exercise name {name!r}")
+        clean_name = aliases.get(clean_name, clean_name)
+        
+        existing_unit = catalog.get(clean_name)
+        if unit:
+            unit_text = unit
+            unit = parse_unit(unit_text)
+            if unit is None:
+                raise ValueError(f"invalid unit {unit_text!r}, choose from: {', '.join(EXERCISE_UNITS)}")
+            if existing_unit and unit != existing_unit:
+                raise ValueError(f"unit {unit} conflicts with existing unit {existing_unit} for {clean_name!r}")
+        else:
+            unit = existing_unit or default_import_unit(set_texts)
+        catalog[clean_name] = unit
+        
+        sets = []
+        for text in set_texts:
+            try:
+                sets.append(parse_set_value(unit, text))
+            except ValueError:
+                raise ValueError(f"invalid set {text!r} for {clean_name} ({unit})")
+        if not sets:
+            # Also catches a typo in the last set, which leaves the whole line as the name
+            raise ValueError(f"no sets given for {clean_name!r}")
+        if self.storage.packed_sets and len(sets) > PACKED_MAX_SETS:
+            raise ValueError(f"{len(sets)} sets for {clean_name!r}, packed storage holds at most {PACKED_MAX_SETS}")
+        return {'name': clean_name, 'unit': unit, 'sets': sets}
+    
+    def clear_screen(self):
+        if os.name == 'nt':
+            os.system('cls')
+        else:
+            # ANSI clear and cursor home instead of spawning a clear process per redraw
+            print("\033[2J\033[H", end='', flush=True)
+    
+    def main_menu(self):
+        while True:
+            self.clear_screen()
+            print(MENU_BANNER)
+            print("=" * 60)
+            print("1. Log workout")
+            print("2. Analysis")
+            print("3. History")
+            print("4. Exit")
+            print()
+            
+            choice = input("Select option: ").strip()
+            
+            if choice == '1':
+                self.log_workout()
+            elif choice == '2':
+                self.analysis()
+            elif choice == '3':
+                self.history_screen()
+            elif choice == '4':
+                print("\nGoodbye!")
+                break
+            else:
+                input("Invalid option. Press Enter to continue...")
+
+    def log_workout(self):
+        try:
+            # Get existing exercises and aliases for autocomplete and new exercise detection
+            with self.phase('load names'):
+                name_index = self.get_name_index()
+            
+            self.clear_screen()
+            print("=" * 40)
+            print("         LOG WORKOUT")
+            print("=" * 40)
+            print()
+            
+            workout_data = []  # Store all workout data in memory
+            
+            while True:
+                exercise_name = self.get_exercise_input(name_index)
+                
+                if exercise_name is None:  # Cancelled via Ctrl+C
+                    break
+                if not exercise_name:  # Empty input to quit
+                    break
+                
+                clean_name = clean_exercise_name(exercise_name)
+                with self.phase('lookup'):
+                    canonical_name = name_index.resolve(clean_name)
+                if canonical_name != clean_name:
+                    print(f"Alias: {clean_name} -> {canonical_name}")
+                    clean_name = canonical_name
+                elif clean_name not in name_index:
+                    # Catch near-duplicates ("bb curl" vs "bb curls") before creating a new exercise
+                    clean_name = self.choose_similar_exercise(name_index, clean_name) or clean_name
+                
+                # Check if exercise exists and get its unit, or prompt for new unit
+                with self.phase('lookup'):
+                    existing_unit = self.get_exercise_with_unit(clean_name)
+                if existing_unit:
+                    unit = existing_unit
+                    is_new_exercise = False
+                    print(f"Using existing exercise: {clean_name} ({unit})")
+                else:
+                    unit = self.get_exercise_unit()
+                    if unit is None:  # Cancelled via Ctrl+C
+                        continue  # Back to exercise name input
+                    is_new_exercise = True
+                    print(f"New exercise: {clean_name} ({unit})")
+                    # Add to the name index for future autocomplete in this session
+                    name_index.add(clean_name)
+                
+                # Set input loop with cancellation handling
+                sets_entered = []
+                set_number = 1
+                
+                while True:
+                    set_result = self.get_set_input(unit, set_number)
+                    
+                    if set_result == "CANCELLED":
+                        # Handle cancellation based on whether sets were entered
+                        if sets_entered:
+                            try:
+                                confirm = input(f"\nYou have entered {len(sets_entered)} set(s). Discard and return to exercise input? (y/n): ").strip().lower()
+                                if confirm == 'y':
+                                    print("Sets discarded, returning to exercise input...")
+                                    break  # Exit set loop, back to exercise input
+                                else:
+                                    continue  # Stay in set input loop
+                            except KeyboardInterrupt:
+                                print("\nReturning to exercise input...")
+                                break
+                        else:
+                            print("\nCancelled, returning to exercise input...")
+                            break  # Exit set loop, back to exercise input
+                    elif set_result is None:
+                        # Empty input, done with sets
+                        break
+                    else:
+                        # Valid set entered
+                        weight, reps = set_result
+                        sets_entered.append((weight, reps))
+                        
+                        # Show confirmation based on unit type
+                        if unit in SINGLE_VALUE_UNITS:
+                            print(f"  ✓ Set {set_number}: {weight} {unit}")
+                        else:
+                            print(f"  ✓ Set {set_number}: {weight} {unit} x {reps}")
+                        
+                        set_number += 1
+                        if self.storage.packed_sets and len(sets_entered) >= PACKED_MAX_SETS:
+                            print(f"Packed storage holds at most {PACKED_MAX_SETS} sets per exercise.")
+                            break
+                
+                # If sets were entered, add exercise to workout data
+                if sets_entered:
+                    workout_data.append({
+                        'name': clean_name,
+                        'unit': unit,
+                        'sets': sets_entered,
+                        'is_new': is_new_exercise
+                    })
+                
+                print()  # Blank line between exercises
+            
+            # If no exercises were logged, just return
+            if not workout_data:
+                print("No exercises logged.")
+                input("Press Enter to continue...")
+                return
+            
+            # Display confirmation table and save if approved
+            with self.phase('confirmation'):
+                confirmed = self.display_workout_confirmation(workout_data)
+            if confirmed:
+                with self.phase('save'):
+                    saved = self.save_workout_to_db(workout_data)
+                if saved:
+                    print("\nWorkout logged successfully!")
+                else:
+                    print("\nError saving workout. Please try again.")
+            else:
+                print("\nWorkout cancelled.")
+            
+            input("Press Enter to continue...")
+            
+        except KeyboardInterrupt:
+            print("\nReturning to main menu...")
+            return
+    
+    def get_exercise_stats(self):
+        """
+        Retrieve the pre-aggregated summary row for every exercise,
+        most recently performed first.
+        """
+        try:
+            return self.cached(('exercise_stats',), lambda: self.storage.execute('''
+                SELECT name, unit, workouts, total_sets, total_reps, total_volume,
+                       best_weight, best_reps, best_e1rm, last_date
+                FROM exercise_stats ORDER BY last_date DESC
+            ''').fetchall())
+        except sqlite3.Error as e:
+            print(f"Database error retrieving stats: {e}")
+            return []
+    
+    def get_weekly_volume(self, exercise_name, weeks=12):
+        """
+        Retrieve (week, sets, reps, volume) for the most recent weeks an
+        exercise was performed, newest first. week is the Monday, 'YYYY-MM-DD'.
+        """
+        try:
+            cursor = self.storage.execute('''
+                SELECT start, sets, reps, volume FROM exercise_rollups
+                WHERE name = ? AND period = 'week' ORDER BY start DESC LIMIT ?
+            ''', (exercise_name, weeks))
+            return [(date.fromordinal(start).isoformat(), sets, reps, volume) for start, sets, reps, volume in cursor]
+        except sqlite3.Error as e:
+            print(f"Database error retrieving weekly volume: {e}")
+            return []
+    
+    def get_rollups(self, exercise_name, period, first_day=None, last_day=None, limit=None):
+        """
+        (start day number, sets, reps, volume, best e1rm) for the day, week
+        or month buckets of an exercise starting within [first_day, last_day],
+        oldest first; with limit, only the newest `limit` of them. A primary
+        key range scan on exercise_rollups, cached until the next write.
+        """
+        def query():
+            rows = self.storage.execute('''
+                SELECT start, sets, reps, volume, best_e1rm FROM exercise_rollups
+                WHERE name = ? AND period = ? AND start BETWEEN ? AND ?
+                ORDER BY start DESC LIMIT ?
+            ''', (exercise_name, period, first_day or 0, last_day or date.max.toordinal(),
+                  -1 if limit is None else limit)).fetchall()
+            rows.reverse()
+            return rows
+        
+        return self.cached(('rollups', exercise_name, period, first_day, last_day, limit), query)
+    
+    def alias_command(self, alias, exercise_name):
+        if alias is None:
+            for alias, exercise_name in sorted(self.get_aliases().items()):
+                print(f"{alias} -> {exercise_name}")
+            return 0
+        if exercise_name is None:
+            print("Usage: fitlog.py alias ALIAS EXERCISE")
+            return 2
+        alias = clean_exercise_name(alias)
+        exercise_name = clean_exercise_name(exercise_name)
+        if not self.save_alias(alias, exercise_name):
+            return 1
+        print(f"{alias} -> {exercise_name}")
+        return 0
+    
+    def rebuild_stats(self):
+        try:
+            count = rebuild_stats(self.storage)
+            print(f"Rebuilt stats for {count} exercise(s).")
+            return True
+        except sqlite3.Error as e:
+            print(f"Database error rebuilding stats: {e}")
+            return False
+    
+    def set_storage_command(self, mode):
+        """
+        Convert between one row per set ('rows') and one packed blob per
+        exercise ('packed'), then VACUUM so the file actually shrinks.
+        Returns an exit status.
+        """
+        from fitlog_packed import pack_set_rows, unpack_set_rows
+        
+        current = 'packed' if self.storage.packed_sets else 'rows'
+        if mode == current:
+            print(f"Sets are already stored as {mode}.")
+            return 0
+        
+        try:
+            self.storage.execute('PRAGMA wal_checkpoint(TRUNCATE)')
+            before = os.path.getsize(self.db_path)
+            start = time.perf_counter()
+            count = pack_set_rows(self.storage) if mode == 'packed' else unpack_set_rows(self.storage)
+            self.storage.execute('VACUUM')
+            self.storage.execute('PRAGMA wal_checkpoint(TRUNCATE)')
+        except (sqlite3.Error, ValueError) as e:
+            print(f"Error converting set storage: {e}", file=sys.stderr)
+            return 1
+        elapsed = time.perf_counter() - start
+        after = os.path.getsize(self.db_path)
+        print(f"Converted {count:,} sets to {mode} storage in {elapsed:.1f}s "
+              f"({before / 1e6:.1f} MB -> {after / 1e6:.1f} MB).")
+        return 0
+    
+    def history_screen(self):
+        self.clear_screen()
+        print("=" * 40)
+        print("         HISTORY")
+        print("=" * 40)
+        print()
+        
+        try:
+            name_index = self.get_name_index()
+            exercise_name = self.get_exercise_input(name_index, "Exercise Name (or empty to return): ")
+            if exercise_name:
+                exercise_name = name_index.resolve(clean_exercise_name(exercise_name))
+                unit = self.get_exercise_with_unit(exercise_name)
+                if unit is None:
+                    print(f"No history for {exercise_name}.")
+                else:
+                    self.page_history(exercise_name, unit)
+            print()
+            input("Press Enter to continue...")
+        except KeyboardInterrupt:
+            print("\nReturning to main menu...")
+    
+    def analysis(self):
+        self.clear_screen()
+        print("=" * 40)
+        print("         ANALYSIS")
+        print("=" * 40)
+        print()
+        
+        stats = self.get_exercise_stats()
+        if not stats:
+            print("No workouts logged yet.")
+            print()
+            input("Press Enter to continue...")
+            return
+        
+        self.print_stats_table(stats)
+        print()
+        
+        try:
+            while True:
+                exercise_name = input("Exercise for trends (or empty to return): ").strip()
+                if not exercise_name:
+                    break
+                self.show_exercise_trends(self.resolve_exercise_name(exercise_name))
+        except KeyboardInterrupt:
+            print("\nReturning to main menu...")
+    
+    def print_stats_table(self, stats):
+        print(f"{'Exercise':<24} {'Sessions':>8} {'Sets':>6} {'Volume':>10} {'':<7}  {'Best Set':<20} {'Est. 1RM':>9}  Last")
+        print("-" * 104)
+        for name, unit, workouts, total_sets, total_reps, volume, best_weight, best_reps, e1rm, last_date in stats:
+            e1rm_text = f"{e1rm:.1f}" if e1rm is not None else "-"
+            print(f"{name.title():<24} {workouts:>8} {total_sets:>6} {volume:>10,.1f} {unit:<7}  "
+                  f"{format_set(unit, best_weight, best_reps):<20} {e1rm_text:>9}  {last_date[:10]}")
+    
+    def get_exercise_trends(self, exercise_name, unit, sessions_shown=8, records_shown=5):
+        """
+        Weekly volume from the summary table plus rolling volume, best to
+        date and personal records computed by ExerciseSeries over the full
+        history, as plain data: {'sets', 'weekly', 'recent', 'records'}
+        with ISO dates. Cached until the next write, so reopening the view
+        does not reload the history.
+        """
+        def compute():
+            series = ExerciseSeries.load(self.storage, exercise_name, unit)
+            days, rolling = series.rolling_volume()
+            _, best = series.running_best()
+            return {
+                'sets': len(series),
+                'weekly': self.get_weekly_volume(exercise_name),
+                'recent': [(date.fromordinal(int(days[i])).isoformat(), float(rolling[i]), float(best[i]))
+                           for i in range(max(len(days) - sessions_shown, 0), len(days))],
+                'records': [(record_date.isoformat(), float(value))
+                            for record_date, value in series.personal_records()[-records_shown:]],
+            }
+        
+        return self.cached(('trends', exercise_name, unit, sessions_shown, records_shown), compute)
+    
+    def show_exercise_trends(self, exercise_name, sessions_shown=8, records_shown=5):
+        """
+        Print weekly volume, then rolling volume and personal records over
+        the full history (see get_exercise_trends).
+        """
+        unit = self.get_exercise_with_unit(exercise_name)
+        if unit is None:
+            print(f"No history for {exercise_name}.")
+            return
+        try:
+            trends = self.get_exercise_trends(exercise_name, unit, sessions_shown, records_shown)
+        except sqlite3.Error as e:
+            print(f"Database error loading history: {e}")
+            return
+        
+        metric_label = "est. 1RM" if unit in WEIGHT_UNITS else "best"
+        print(f"\n{exercise_name.title()} ({unit}) - {trends['sets']} sets")
+        
+        print("\n  Weekly volume:")
+        for week, week_sets, week_reps, week_volume in trends['weekly']:
+            print(f"    Week of {week}: {week_sets:>3} sets  {week_volume:>10,.1f}")
+        
+        print(f"\n  Recent sessions ({ROLLING_WINDOW_DAYS}-day volume, {metric_label} to date):")
+        for session_date, rolling, best in trends['recent']:
+            print(f"    {session_date}: {rolling:>10,.1f}  {best:>8.1f}")
+        
+        print(f"\n  Personal records ({metric_label}):")
+        for record_date, value in trends['records']:
+            print(f"    {record_date}: {value:.1f}")
+        print()
+
+    def progress_command(self, name, period='week', since=None, until=None, limit=PROGRESS_BUCKETS):
+        """
+        Print an exercise's day, week or month buckets between two dates,
+        or the most recent `limit` of them. Returns an exit status.
+        """
+        exercise_name = self.resolve_exercise_name(name)
+        unit = self.get_exercise_with_unit(exercise_name)
+        if unit is None:
+            print(f"No history for {exercise_name}.", file=sys.stderr)
+            return 1
+        try:
+            first_day = day_number(parse_date(since)) if since else None
+            last_day = day_number(parse_date(until)) if until else None
+        except ValueError as e:
+            print(f"Error: {e}", file=sys.stderr)
+            return 2
+        
+        rows = self.get_rollups(exercise_name, period, first_day, last_day, None if since else limit)
+        label = {'day': 'Day', 'week': 'Week of', 'month': 'Month'}[period]
+        print(f"{exercise_name.title()} ({unit}) by {period}\n")
+        print(f"  {label:<10} {'Sets':>6} {'Reps':>7} {'Volume':>12} {'Est. 1RM':>9}")
+        for start, sets, reps, volume, best_e1rm in rows:
+            start_text = date.fromordinal(start).isoformat()
+            if period == 'month':
+                start_text = start_text[:7]
+            best_text = f"{best_e1rm:.1f}" if best_e1rm is not None else "-"
+            print(f"  {start_text:<10} {sets:>6} {reps:>7} {volume:>12,.1f} {best_text:>9}")
+        return 0
+    
+    def resolve_exercise_name(self, name):
+        """
+        Clean a typed name and follow its alias, if any, with index seeks
+        rather than loading the whole catalog.
+        """
+        clean_name = clean_exercise_name(name)
+        row = self.storage.execute('SELECT name FROM exercise_aliases WHERE alias = ?', (clean_name,)).fetchone()
+        return row[0] if row else clean_name
+    
+    def prepare_exercises(self, items):
+        """
+        Validate (name, unit, set_texts) items for write_workouts: names are
+        cleaned and follow aliases, existing exercises keep their unit, and
+        every set must parse for that unit as it would at the set prompt.
+        Raises ValueError describing the first problem.
+        """
+        catalog = {}
+        exercises = []
+        for name, unit, set_texts in items:
+            clean_name = self.resolve_exercise_name(name)
+            existing_unit = self.get_exercise_with_unit(clean_name)
+            if existing_unit:
+                catalog[clean_name] = existing_unit
+            exercises.append(self._resolve_import_exercise(catalog, {}, clean_name, unit, set_texts))
+        return exercises
+    
+    def find_exercises(self, prefix, limit=COMPLETION_LIMIT):
+        """
+        Catalog entries whose name starts with prefix, as {'name', 'unit'}
+        dicts in name order, using a range seek on the catalog key.
+        """
+        prefix = EXERCISE_NAME_DISALLOWED.sub('', prefix).lower().lstrip()
+        cursor = self.storage.execute(
+            'SELECT name, unit FROM exercise_catalog WHERE name >= ? AND name < ? ORDER BY name LIMIT ?',
+            (prefix, prefix + '\U0010ffff', limit))
+        return [{'name': name, 'unit': unit} for name, unit in cursor]
+    
+    def log_command(self, entries, workout_date=None):
+        """
+        Log one workout from paper-log notation without prompting, e.g.
+        ["bench press 185x5 185x5 205x3", "running miles 3.1"].
+        Returns an exit status.
+        """
+        try:
+            workout_date = parse_date(workout_date) if workout_date else datetime.now().isoformat()
+            exercises = self.prepare_exercises(parse_set_notation(entry) for entry in entries)
+        except ValueError as e:
+            print(f"Error: {e}", file=sys.stderr)
+            return 2
+        
+        try:
+            with self.storage.transaction():
+                self.write_workouts([(workout_date, exercises)])
+        except (sqlite3.Error, ValueError) as e:
+            print(f"Error saving workout: {e}", file=sys.stderr)
+            return 1
+        
+        for exercise in exercises:
+            sets = ', '.join(format_set(exercise['unit'], weight, reps) for weight, reps in exercise['sets'])
+            print(f"Logged {exercise['name']}: {sets}")
+        return 0
+    
+    def history_command(self, name, limit=None, show_all=False):
+        """
+        Print an exercise's sessions, newest first: `limit` of them, all of
+        them, or (on a terminal, by default) a page at a time on demand.
+        Returns an exit status.
+        """
+        exercise_name = self.resolve_exercise_name(name)
+        unit = self.get_exercise_with_unit(exercise_name)
+        if unit is None:
+            print(f"No history for {exercise_name}.", file=sys.stderr)
+            return 1
+        
+        if limit is None and not show_all and sys.stdin.isatty() and sys.stdout.isatty():
+            self.page_history(exercise_name, unit)
+            return 0
+        if limit is None and not show_all:
+            limit = HISTORY_PAGE_SIZE
+        sessions = self.iter_history(exercise_name, min(limit or HISTORY_PAGE_SIZE, HISTORY_PAGE_SIZE))
+        for workout_date, sets in sessions if show_all else islice(sessions, limit):
+            self.print_session(unit, workout_date, sets)
+        return 0
+    
+    def print_session(self, unit, workout_date, sets):
+        print(f"\n{workout_date[:16].replace('T', ' ')}")
+        for weight, reps in sets:
+            print(f"  {format_set(unit, weight, reps)}")
+    
+    def page_history(self, exercise_name, unit, page_size=HISTORY_PAGE_SIZE):
+        """
+        Show sessions a page at a time. Each page is fetched only when asked
+        for, so the first appears at once however long the history is.
+        """
+        print(f"\n{exercise_name.title()} ({unit}), newest first")
+        shown = 0
+        try:
+            for workout_date, sets in self.iter_history(exercise_name, page_size):
+                if shown and shown % page_size == 0:
+                    more = input(f"\n-- {shown} sessions shown: Enter for more, q to stop -- ").strip().lower()
+                    if more == 'q':
+                        return
+                self.print_session(unit, workout_date, sets)
+                shown += 1
+        except KeyboardInterrupt:
+            print()
+            return
+        print(f"\n-- end of history ({shown} sessions) --")
+    
+    def get_history(self, name, limit=10):
+        """
+        The most recent sessions of an exercise, newest first, following
+        aliases. Returns (exercise name, unit or None if unknown,
+        [(date, [(weight, reps), ...]), ...]).
+        """
+        exercise_name = self.resolve_exercise_name(name)
+        unit = self.get_exercise_with_unit(exercise_name)
+        if unit is None:
+            return exercise_name, None, []
+        sessions = self.cached(('history', exercise_name, limit), lambda: list(
+            islice(self.iter_history(exercise_name, min(limit, HISTORY_PAGE_SIZE)), limit)))
+        return exercise_name, unit, sessions
+    
+    def iter_history(self, exercise_name, page_size=HISTORY_PAGE_SIZE):
+        """
+        Yield (date, [(weight, reps), ...]) for each session of an exercise,
+        newest first, fetching page_size sessions per query. Pages continue
+        from the last (date, workout id, exercise id) seen rather than an
+        OFFSET. Workouts are walked backwards through idx_workouts_date, so
+        no page needs a sort and memory stays at one page. Sets logged in
+        another unit are converted to the exercise's catalog unit.
+        """
+        unit = self.get_exercise_with_unit(exercise_name)
+        key = None
+        while True:
+            if key is None:
+                rows = self.storage.execute('''
+                    SELECT w.date, w.id, e.id, e.packed_sets, COALESCE(e.unit, 'lbs')
+                    FROM workouts w CROSS JOIN exercises e ON e.workout_id = w.id
+                    WHERE e.name = ?
+                    ORDER BY w.date DESC, w.id DESC, e.id DESC
+                    LIMIT ?
+                ''', (exercise_name, page_size)).fetchall()
+            else:
+                last_date, last_workout, last_exercise = key
+                rows = self.storage.execute('''
+                    SELECT w.date, w.id, e.id, e.packed_sets, COALESCE(e.unit, 'lbs')
+                    FROM workouts w CROSS JOIN exercises e ON e.workout_id = w.id
+                    WHERE e.name = ? AND w.date <= ?
+                      AND (w.date < ? OR w.id < ? OR (w.id = ? AND e.id < ?))
+                    ORDER BY w.date DESC, w.id DESC, e.id DESC
+                    LIMIT ?
+                ''', (exercise_name, last_date, last_date, last_workout, last_workout, last_exercise,
+                      page_size)).fetchall()
+            if not rows:
+                return
+            
+            if self.storage.packed_sets:
+                page_sets = {exercise_id: list(zip(*unpack_sets(blob)))
+                             for _, _, exercise_id, blob, _ in rows if blob}
+            else:
+                page_sets = {}
+                ids = [row[2] for row in rows]
+                cursor = self.storage.execute(f'''
+                    SELECT exercise_id, weight, reps FROM sets
+                    WHERE exercise_id IN ({', '.join('?' * len(ids))})
+                    ORDER BY exercise_id, set_order
+                ''', ids)
+                for exercise_id, weight, reps in cursor:
+                    page_sets.setdefault(exercise_id, []).append((weight, reps))
+            
+            for workout_date, _, exercise_id, _, row_unit in rows:
+                # Sessions without any sets are skipped, as in the stats
+                if exercise_id in page_sets:
+                    yield workout_date, convert_sets(page_sets[exercise_id], row_unit, unit)
+            if len(rows) < page_size:
+                return
+            key = rows[-1][:3]
+    
+    def stats_command(self, name=None):
+        if name:
+            self.show_exercise_trends(self.resolve_exercise_name(name))
+            return 0
+        stats = self.get_exercise_stats()
+        if not stats:
+            print("No workouts logged yet.")
+            return 0
+        self.print_stats_table(stats)
+        return 0
+
+def main():
+    parser = argparse.ArgumentParser(description="CLI workout tracker. Run without a command for the interactive menu.")
+    parser.add_argument('--db', default='fitlog.db', help="database file (default: fitlog.db)")
+    parser.add_argument('--profile', action='store_true',
+                        help=f"print per-statement SQL timings and phase times on exit (or set {PROFILE_ENV}=1)")
+    parser.add_argument('--profile-json', metavar='PATH',
+                        help=f"also write the profile as JSON (or set {PROFILE_JSON_ENV})")
+    parser.add_argument('--result-cache', metavar='PATH',
+                        help="keep analysis results in this file so later runs reuse them until the next write")
+    subparsers = parser.add_subparsers(dest='command')
+    
+    import_parser = subparsers.add_parser('import', help="bulk import workouts from a file")
+    import_parser.add_argument('file', help="CSV, JSONL or plain-text log ('-' for stdin)")
+    import_parser.add_argument('--format', choices=sorted(IMPORT_READERS),
+                               help="input format (default: from file extension, else text)")
+    import_parser.add_argument('--batch-size', type=int, default=50000, help="sets per transaction")
+    
+    subparsers.add_parser('rebuild-stats', help="recompute analysis summary tables from full history")
+    
+    storage_parser = subparsers.add_parser('set-storage', help="store sets one row each, or packed per exercise")
+    storage_parser.add_argument('mode', choices=['rows', 'packed'])
+    
+    alias_parser = subparsers.add_parser('alias', help="list aliases, or map an alternate spelling to an exercise")
+    alias_parser.add_argument('alias', nargs='?', help="alternate spelling, e.g. 'bb curls'")
+    alias_parser.add_argument('exercise', nargs='?', help="existing exercise it stands for")
+    
+    log_parser = subparsers.add_parser('log', help="log a workout without prompts")
+    log_parser.add_argument('entries', nargs='+', metavar='EXERCISE',
+                            help="one exercise with its sets, e.g. 'bench press 185x5 185x5 205x3'")
+    log_parser.add_argument('--date', help="workout date (default: now)")
+    
+    history_parser = subparsers.add_parser('history', help="show recent sessions of an exercise")
+    history_parser.add_argument('exercise', nargs='+')
+    history_parser.add_argument('--limit', type=int,
+                                help=f"sessions to show (default: page through on a terminal, else {HISTORY_PAGE_SIZE})")
+    history_parser.add_argument('--all', action='store_true', help="stream every session without paging")
+    
+    stats_parser = subparsers.add_parser('stats', help="print exercise stats, or one exercise's trends")
+    stats_parser.add_argument('exercise', nargs='*')
+    
+    progress_parser = subparsers.add_parser('progress', help="an exercise's volume and best by day, week or month")
+    progress_parser.add_argument('exercise', nargs='+')
+    progress_parser.add_argument('--by', choices=ROLLUP_PERIODS, default='week')
+    progress_parser.add_argument('--since', help="first date to include")
+    progress_parser.add_argument('--until', help="last date to include (default: today)")
+    progress_parser.add_argument('--limit', type=int, default=PROGRESS_BUCKETS,
+                                 help="most recent buckets to show when --since is not given")
+    
+    export_parser = subparsers.add_parser('export-changes', help="write workouts a peer has not seen to a change file")
+    export_parser.add_argument('file', help="gzipped JSONL output ('-' for stdout)")
+    export_parser.add_argument('--peer', help="sync id of the database it is for (default: the only known peer)")
+    export_parser.add_argument('--since', type=int, metavar='SEQ',
+                               help="export changes after this one instead of the peer's high-water mark")
+    
+    apply_parser = subparsers.add_parser('apply-changes', help="apply a change file from another database")
+    apply_parser.add_argument('file', help="file written by export-changes ('-' for stdin)")
+    
+    sync_parser = subparsers.add_parser('sync-status', help="show this database's sync id and peers' marks")
+    sync_parser.add_argument('--new-id', action='store_true',
+                             help="give this database a new sync id (after copying the file)")
+    
+    report_parser = subparsers.add_parser('report', help="roster report across a directory of athlete databases")
+    report_parser.add_argument('directory', help="directory of per-athlete .db files (opened read-only)")
+    report_parser.add_argument('--jobs', type=int, help="worker processes (default: one per core)")
+    report_parser.add_argument('--json', metavar='PATH', help="also write the merged report as JSON")
+    
+    serve_parser = subparsers.add_parser('serve', help="run the local HTTP/JSON API")
+    serve_parser.add_argument('--host', default=SERVER_HOST)
+    serve_parser.add_argument('--port', type=int, default=SERVER_PORT)
+    serve_parser.add_argument('--threads', type=int, default=SERVER_READ_THREADS,
+                              help="SQLite reader threads")
+    serve_parser.add_argument('--max-batch', type=int, default=SERVER_MAX_BATCH,
+                              help="most workouts saved per commit (1 disables group commit)")
+    
+    args = parser.parse_args()
+    
+    if args.command == 'report':
+        from fitlog_report import report_command
+        
+        return report_command(args.directory, args.jobs, args.json)
+    if args.command == 'serve':
+        from fitlog_server import serve_command
+        
+        return serve_command(args.db, args.host, args.port, args.threads, args.max_batch)
+    
+    profile_json = args.profile_json or os.environ.get(PROFILE_JSON_ENV)
+    profiling = args.profile or profile_json or os.environ.get(PROFILE_ENV, '') not in ('', '0')
+    profiler = None
+    if profiling:
+        from fitlog_profile import Profiler
+        
+        profiler = Profiler()
+    
+    app = FitLog(args.db, profiler, args.result_cache)
+    try:
+        if args.command == 'import':
+            return 0 if app.import_file(args.file, args.format, args.batch_size) else 1
+        if args.command == 'rebuild-stats':
+            return 0 if app.rebuild_stats() else 1
+        if args.command == 'set-storage':
+            return app.set_storage_command(args.mode)
+        if args.command in ('export-changes', 'apply-changes', 'sync-status'):
+            import fitlog_sync
+            
+            if args.command == 'export-changes':
+                return fitlog_sync.export_changes_command(app, args.file, args.peer, args.since)
+            if args.command == 'apply-changes':
+                return fitlog_sync.apply_changes_command(app, args.file)
+            return fitlog_sync.sync_status_command(app, args.new_id)
+        if args.command == 'alias':
+            return app.alias_command(args.alias, args.exercise)
+        if args.command == 'log':
+            return app.log_command(args.entries, args.date)
+        if args.command == 'history':
+            return app.history_command(' '.join(args.exercise), args.limit, args.all)
+        if args.command == 'stats':
+            return app.stats_command(' '.join(args.exercise))
+        if args.command == 'progress':
+            return app.progress_command(' '.join(args.exercise), args.by, args.since, args.until, args.limit)
+        app.main_menu()
+        return 0
+    finally:
+        app.close()
+        if profiler is not None:
+            profiler.print_summary()
+            print(f"Result cache: {app.cache.hits} hit(s), {app.cache.misses} miss(es)", file=sys.stderr)
+            if profile_json:
+                profiler.dump_json(profile_json)
@@ -0,0 +1,74 @@
+"""
+Conversion between row and packed set storage (the set-storage command).
+"""
+
+from fitlog_core import (PACKED_CHUNK_EXERCISES, REBUILD_CHUNK_SETS, SETS_TABLE_SQL, SETS_VIEW_SQL,
+                        UNIT_CONVERSIONS, pack_sets, set_meta, unpack_sets)
+
+
+def pack_set_rows(storage):
+    """
+    Switch a database to packed set storage: each exercise's sets move into
+    one exercises.packed_sets blob, the sets table is dropped and a view of
+    the same shape takes its place. Returns the number of sets packed.
+    """
+    packed = 0
+    with storage.transaction():
+        cursor = storage.execute('SELECT exercise_id, weight, reps FROM sets ORDER BY exercise_id, set_order')
+        current = None
+        sets = []
+        while True:
+            rows = cursor.fetchmany(REBUILD_CHUNK_SETS)
+            updates = []
+            for exercise_id, weight, reps in rows:
+                if exercise_id != current:
+                    if sets:
+                        updates.append((pack_sets(sets), current))
+                    current = exercise_id
+                    sets = []
+                sets.append((weight, reps))
+            # The exercise still being read carries over into the next chunk
+            if not rows and sets:
+                updates.append((pack_sets(sets), current))
+            storage.executemany('UPDATE exercises SET packed_sets = ? WHERE id = ?', updates)
+            packed += len(rows)
+            if not rows:
+                break
+        storage.execute('DROP TABLE sets')
+        storage.execute(SETS_VIEW_SQL)
+        set_meta(storage, 'set_storage', 'packed')
+    storage.packed_sets = True
+    return packed
+
+
+def unpack_set_rows(storage):
+    """
+    Switch a database back to one row per set, the inverse of
+    pack_set_rows. Returns the number of sets written.
+    """
+    written = 0
+    with storage.transaction():
+        storage.execute('DROP VIEW sets')
+        storage.execute(SETS_TABLE_SQL)
+        cursor = storage.execute('''
+            SELECT id, COALESCE(unit, 'lbs'), packed_sets FROM exercises WHERE packed_sets IS NOT NULL ORDER BY id
+        ''')
+        while True:
+            rows = cursor.fetchmany(PACKED_CHUNK_EXERCISES)
+            if not rows:
+                break
+            set_rows = []
+            for exercise_id, unit, blob in rows:
+                weights, reps = unpack_sets(blob)
+                factor = UNIT_CONVERSIONS[unit][1]
+                set_rows.extend((exercise_id, weight, count, set_order, weight * factor)
+                                for set_order, (weight, count) in enumerate(zip(weights, reps), 1))
+            storage.executemany(
+                'INSERT INTO sets (exercise_id, weight, reps, set_order, canonical_weight) VALUES (?, ?, ?, ?, ?)',
+                set_rows)
+            written += len(set_rows)
+        storage.execute('UPDATE exercises SET packed_sets = NULL WHERE packed_sets IS NOT NULL')
+        storage.execute('CREATE INDEX IF NOT EXISTS idx_sets_exercise_order ON sets (exercise_id, set_order)')
+        set_meta(storage, 'set_storage', 'rows')
+    storage.packed_sets = False
+    return written
@@ -0,0 +1,187 @@
+"""
+SQL and phase profiling for --profile. Only imported when profiling is on.
+"""
+
+import sqlite3
+import sys
+import time
+from contextlib import contextmanager
+
+from fitlog_core import PROFILE_VM_STEP
+
+
+class StatementStats:
+    def __init__(self, sql):
+        self.sql = sql
+        self.calls = 0
+        self.executions = 0
+        self.seconds = 0.0
+        self.rows_returned = 0
+        self.rows_changed = 0
+        self.vm_steps = 0
+        self.plan = None
+
+    def to_dict(self):
+        return {
+            'sql': self.sql, 'calls': self.calls, 'executions': self.executions,
+            'seconds': self.seconds, 'rows_returned': self.rows_returned,
+            'rows_changed': self.rows_changed, 'vm_steps': self.vm_steps, 'plan': self.plan,
+        }
+
+
+class ProfiledCursor:
+    """
+    Wraps a cursor so rows fetched and time spent fetching are charged to
+    the statement that produced them.
+    """
+
+    def __init__(self, profiler, cursor, stats):
+        self._profiler = profiler
+        self._cursor = cursor
+        self._stats = stats
+
+    def __getattr__(self, name):
+        return getattr(self._cursor, name)
+
+    def __iter__(self):
+        while True:
+            row = self.fetchone()
+            if row is None:
+                return
+            yield row
+
+    def fetchone(self):
+        row = self._profiler.measure(self._stats, self._cursor.fetchone)
+        if row is not None:
+            self._stats.rows_returned += 1
+        return row
+
+    def fetchmany(self, size=None):
+        rows = self._profiler.measure(self._stats, self._cursor.fetchmany,
+                                      self._cursor.arraysize if size is None else size)
+        self._stats.rows_returned += len(rows)
+        return rows
+
+    def fetchall(self):
+        rows = self._profiler.measure(self._stats, self._cursor.fetchall)
+        self._stats.rows_returned += len(rows)
+        return rows
+
+
+class Profiler:
+    """
+    Opt-in query and phase instrumentation (--profile or FITLOG_PROFILE=1).
+    Every statement issued through Storage is timed, with row counts, the
+    number of statement executions seen by SQLite's trace callback, and VM
+    steps from the progress callback. VM steps per row returned is the
+    scanned-versus-returned signal; EXPLAIN QUERY PLAN on first sight says
+    whether a statement SCANs a table or SEARCHes an index. Named phases
+    time interactive steps such as lookup and save.
+    """
+
+    def __init__(self):
+        self.statements = {}
+        self.phases = {}
+        self._steps = 0
+        self._traced = 0
+
+    def attach(self, conn):
+        self._conn = conn
+        conn.set_trace_callback(self._on_trace)
+        conn.set_progress_handler(self._on_progress, PROFILE_VM_STEP)
+
+    def _on_trace(self, statement):
+        self._traced += 1
+
+    def _on_progress(self):
+        self._steps += PROFILE_VM_STEP
+        return 0
+
+    def _stats_for(self, sql, params):
+        key = ' '.join(sql.split())
+        stats = self.statements.get(key)
+        if stats is None:
+            stats = self.statements[key] = StatementStats(key)
+            stats.plan = self._query_plan(sql, params)
+        return stats
+
+    def _query_plan(self, sql, params):
+        # Runs untracked so the plan lookup isn't charged to any statement
+        self._conn.set_trace_callback(None)
+        self._conn.set_progress_handler(None, 0)
+        try:
+            rows = self._conn.execute('EXPLAIN QUERY PLAN ' + sql, params).fetchall()
+            return '; '.join(row[-1] for row in rows) or None
+        except (sqlite3.Error, sqlite3.Warning, ValueError):
+            return None
+        finally:
+            self.attach(self._conn)
+
+    def measure(self, stats, fn, *args):
+        steps = self._steps
+        traced = self._traced
+        start = time.perf_counter()
+        try:
+            return fn(*args)
+        finally:
+            stats.seconds += time.perf_counter() - start
+            stats.vm_steps += self._steps - steps
+            stats.executions += self._traced - traced
+
+    def execute(self, conn, sql, params):
+        stats = self._stats_for(sql, params)
+        stats.calls += 1
+        cursor = self.measure(stats, conn.execute, sql, params)
+        stats.rows_changed += max(cursor.rowcount, 0)
+        return ProfiledCursor(self, cursor, stats)
+
+    def executemany(self, conn, sql, rows):
+        rows = list(rows)
+        stats = self._stats_for(sql, rows[0] if rows else ())
+        stats.calls += 1
+        cursor = self.measure(stats, conn.executemany, sql, rows)
+        stats.rows_changed += max(cursor.rowcount, 0)
+        return cursor
+
+    @contextmanager
+    def phase(self, name):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            calls, seconds = self.phases.get(name, (0, 0.0))
+            self.phases[name] = (calls + 1, seconds + time.perf_counter() - start)
+
+    def to_dict(self):
+        return {
+            'statements': [stats.to_dict() for stats in
+                           sorted(self.statements.values(), key=lambda stats: -stats.seconds)],
+            'phases': {name: {'calls': calls, 'seconds': seconds}
+                       for name, (calls, seconds) in self.phases.items()},
+        }
+
+    def dump_json(self, path):
+        import json
+        
+        with open(path, 'w') as f:
+            json.dump(self.to_dict(), f, indent=2)
+
+    def print_summary(self, file=sys.stderr, limit=20, sql_width=60):
+        statements = sorted(self.statements.values(), key=lambda stats: -stats.seconds)
+        total = sum(stats.seconds for stats in statements)
+        print(f"\nSQL profile: {len(statements)} distinct statements, {total * 1e3:.1f} ms total", file=file)
+        print(f"{'calls':>6} {'execs':>7} {'total ms':>9} {'mean us':>9} {'rows':>8} {'changed':>8} "
+              f"{'steps/row':>9}  {'plan':<6} statement", file=file)
+        for stats in statements[:limit]:
+            steps_per_row = stats.vm_steps / stats.rows_returned if stats.rows_returned else float(stats.vm_steps)
+            plan = 'SCAN' if stats.plan and 'SCAN' in stats.plan else ('index' if stats.plan else '-')
+            sql = stats.sql if len(stats.sql) <= sql_width else stats.sql[:sql_width - 3] + '...'
+            print(f"{stats.calls:>6} {stats.executions:>7} {stats.seconds * 1e3:>9.2f} "
+                  f"{stats.seconds / stats.calls * 1e6:>9.1f} {stats.rows_returned:>8} {stats.rows_changed:>8} "
+                  f"{steps_per_row:>9.0f}  {plan:<6} {sql}", file=file)
+        if len(statements) > limit:
+            print(f"... {len(statements) - limit} more in the JSON dump", file=file)
+        if self.phases:
+            print(f"\n{'phase':<16} {'calls':>6} {'total ms':>9} {'mean ms':>9}", file=file)
+            for name, (calls, seconds) in sorted(self.phases.items()):
+                print(f"{name:<16} {calls:>6} {seconds * 1e3:>9.2f} {seconds / calls * 1e3:>9.2f}", file=file)
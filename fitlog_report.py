@@ -0,0 +1,144 @@
+"""
+Roster reports across a directory of athlete databases (the report command).
+"""
+
+import os
+import sqlite3
+import sys
+from datetime import date
+
+from fitlog_core import (REPORT_RECENT_DAYS, REPORT_TASKS_PER_CHILD, REPORT_TOP_EXERCISES,
+                        SUMMARY_SCHEMA_VERSION, Storage)
+
+
+def athlete_report(db_path):
+    """
+    Summarise one athlete's database for a roster report. Runs in a worker
+    process, so it opens its own read-only connection, reads only the
+    summary tables and returns plain picklable values. Failures are
+    returned as {'error': ...} so one bad file doesn't sink the batch.
+    """
+    athlete = os.path.splitext(os.path.basename(db_path))[0]
+    try:
+        storage = Storage(db_path, readonly=True)
+    except sqlite3.Error as e:
+        return {'athlete': athlete, 'path': db_path, 'error': str(e)}
+    try:
+        version = storage.execute('PRAGMA user_version').fetchone()[0]
+        if version < SUMMARY_SCHEMA_VERSION:
+            return {'athlete': athlete, 'path': db_path,
+                    'error': f"schema too old, run 'fitlog.py --db {db_path} rebuild-stats' first"}
+        workouts, first_date, last_date = storage.execute(
+            'SELECT COUNT(*), MIN(date), MAX(date) FROM workouts').fetchone()
+        exercises = storage.execute('''
+            SELECT name, unit, workouts, total_sets, total_reps, total_volume, best_e1rm, last_date
+            FROM exercise_stats
+        ''').fetchall()
+        recent_sets = storage.execute('''
+            SELECT COALESCE(SUM(sets), 0) FROM exercise_rollups
+            WHERE name IN (SELECT name FROM exercise_stats) AND period = 'day' AND start > ?
+        ''', (date.today().toordinal() - REPORT_RECENT_DAYS,)).fetchone()[0]
+    except sqlite3.Error as e:
+        return {'athlete': athlete, 'path': db_path, 'error': str(e)}
+    finally:
+        storage.close()
+    return {
+        'athlete': athlete, 'path': db_path, 'workouts': workouts,
+        'first_date': first_date, 'last_date': last_date,
+        'total_sets': sum(row[3] for row in exercises), 'recent_sets': recent_sets,
+        'exercises': [list(row) for row in exercises],
+    }
+
+
+def merge_reports(reports):
+    """
+    Combine per-athlete reports into a roster: athletes sorted by name,
+    failures split out, and a per-exercise leaderboard keyed on
+    (name, unit) so lbs and kg lifts are never compared.
+    """
+    athletes = sorted((r for r in reports if 'error' not in r), key=lambda r: r['athlete'])
+    failed = sorted((r for r in reports if 'error' in r), key=lambda r: r['athlete'])
+    leaderboard = {}
+    for report in athletes:
+        for name, unit, workouts, total_sets, total_reps, volume, e1rm, last_date in report['exercises']:
+            entry = leaderboard.get((name, unit))
+            if entry is None:
+                entry = leaderboard[(name, unit)] = {
+                    'name': name, 'unit': unit, 'athletes': 0, 'total_sets': 0,
+                    'best_e1rm': None, 'best_athlete': None,
+                }
+            entry['athletes'] += 1
+            entry['total_sets'] += total_sets
+            if e1rm is not None and (entry['best_e1rm'] is None or e1rm > entry['best_e1rm']):
+                entry['best_e1rm'] = e1rm
+                entry['best_athlete'] = report['athlete']
+    exercises = sorted(leaderboard.values(), key=lambda e: (-e['athletes'], -e['total_sets'], e['name']))
+    return {
+        'athletes': [{key: value for key, value in r.items() if key != 'exercises'} for r in athletes],
+        'failed': failed,
+        'exercises': exercises,
+        'totals': {
+            'athletes': len(athletes),
+            'workouts': sum(r['workouts'] for r in athletes),
+            'total_sets': sum(r['total_sets'] for r in athletes),
+            'recent_sets': sum(r['recent_sets'] for r in athletes),
+        },
+    }
+
+
+def build_roster_report(db_paths, jobs=None):
+    """
+    Run athlete_report over db_paths on a process pool of up to `jobs`
+    workers (default: one per core) and merge the results. Workers are
+    recycled every REPORT_TASKS_PER_CHILD databases so memory stays
+    bounded however large the roster is. jobs=1 runs in-process.
+    """
+    jobs = min(jobs or os.cpu_count() or 1, len(db_paths)) or 1
+    if jobs == 1:
+        return merge_reports([athlete_report(path) for path in db_paths])
+    import multiprocessing
+    
+    with multiprocessing.Pool(jobs, maxtasksperchild=REPORT_TASKS_PER_CHILD) as pool:
+        reports = list(pool.imap_unordered(athlete_report, db_paths, chunksize=1))
+    return merge_reports(reports)
+
+
+def print_roster_report(roster, top=REPORT_TOP_EXERCISES):
+    totals = roster['totals']
+    print(f"Roster: {totals['athletes']} athletes, {totals['workouts']:,} workouts, "
+          f"{totals['total_sets']:,} sets ({totals['recent_sets']:,} in the last {REPORT_RECENT_DAYS} days)\n")
+    print(f"{'Athlete':<24} {'Workouts':>8} {'Sets':>9} {'Recent':>7}  {'First':<10}  Last")
+    print("-" * 76)
+    for athlete in roster['athletes']:
+        first = (athlete['first_date'] or '-')[:10]
+        last = (athlete['last_date'] or '-')[:10]
+        print(f"{athlete['athlete']:<24} {athlete['workouts']:>8} {athlete['total_sets']:>9,} "
+              f"{athlete['recent_sets']:>7}  {first:<10}  {last}")
+    if roster['exercises']:
+        print(f"\n{'Exercise':<24} {'':<7} {'Athletes':>8} {'Sets':>9} {'Best 1RM':>9}  Held by")
+        print("-" * 76)
+        for entry in roster['exercises'][:top]:
+            e1rm = f"{entry['best_e1rm']:.1f}" if entry['best_e1rm'] is not None else "-"
+            print(f"{entry['name'].title():<24} {entry['unit']:<7} {entry['athletes']:>8} "
+                  f"{entry['total_sets']:>9,} {e1rm:>9}  {entry['best_athlete'] or '-'}")
+    for failure in roster['failed']:
+        print(f"Skipped {failure['path']}: {failure['error']}", file=sys.stderr)
+
+
+def report_command(directory, jobs=None, json_path=None):
+    if not os.path.isdir(directory):
+        print(f"Not a directory: {directory}")
+        return 1
+    db_paths = sorted(os.path.join(directory, name) for name in os.listdir(directory)
+                      if name.endswith('.db'))
+    if not db_paths:
+        print(f"No .db files in {directory}")
+        return 1
+    roster = build_roster_report(db_paths, jobs)
+    print_roster_report(roster)
+    if json_path:
+        import json
+        
+        with open(json_path, 'w') as f:
+            json.dump(roster, f, indent=2)
+    return 1 if roster['failed'] else 0
@@ -0,0 +1,318 @@
+"""
+The local HTTP/JSON API (the serve command).
+"""
+
+import os
+import sqlite3
+import sys
+from datetime import date, datetime
+
+from fitlog_core import (COMPLETION_LIMIT, FitLog, HTTP_REASONS, PROGRESS_BUCKETS, ROLLUP_PERIODS,
+                        SERVER_HOST, SERVER_MAX_BATCH, SERVER_MAX_BODY, SERVER_PORT, SERVER_READ_THREADS,
+                        day_number, parse_date, parse_workout_record)
+
+
+class HTTPError(Exception):
+    def __init__(self, status, message):
+        super().__init__(message)
+        self.status = status
+        self.message = message
+
+
+class WriteBatcher:
+    """
+    Group commit for the API server. Saves are queued as they arrive; one
+    writer task drains everything waiting (up to max_batch workouts) into
+    a single write_workouts call and transaction, so N concurrent saves
+    cost one COMMIT instead of N. Saves that arrive during a commit form
+    the next batch.
+    """
+
+    def __init__(self, server, max_batch=SERVER_MAX_BATCH):
+        import asyncio
+        
+        self.server = server
+        self.max_batch = max_batch
+        self.queue = asyncio.Queue()
+        self.batches = 0
+        self.workouts = 0
+
+    async def submit(self, workout):
+        import asyncio
+        
+        future = asyncio.get_event_loop().create_future()
+        await self.queue.put((workout, future))
+        return await future
+
+    async def run(self):
+        while True:
+            pending = [await self.queue.get()]
+            while len(pending) < self.max_batch and not self.queue.empty():
+                pending.append(self.queue.get_nowait())
+            try:
+                await self.server.write(self._commit, [workout for workout, _ in pending])
+            except Exception as e:
+                if len(pending) == 1:
+                    self._settle(pending[0][1], e)
+                    continue
+                # The batch rolled back as a whole; retry one by one so only
+                # the workout that caused it fails
+                for workout, future in pending:
+                    try:
+                        await self.server.write(self._commit, [workout])
+                    except Exception as e:
+                        self._settle(future, e)
+                    else:
+                        self._settle(future)
+            else:
+                for _, future in pending:
+                    self._settle(future)
+
+    @staticmethod
+    def _settle(future, error=None):
+        # Every waiting request must hear back, whatever went wrong
+        if future.done():
+            return
+        if error is None:
+            future.set_result(None)
+        else:
+            future.set_exception(error)
+
+    def _commit(self, app, workouts):
+        try:
+            with app.storage.transaction():
+                app.write_workouts(workouts)
+        except ValueError as e:
+            # Another request created the exercise in a unit of a different kind after this one was validated
+            raise HTTPError(409, str(e))
+        self.batches += 1
+        self.workouts += len(workouts)
+
+
+class FitLogServer:
+    """
+    Local HTTP/JSON API over one database, for several clients logging at
+    once. The event loop only parses requests; SQLite work runs on a
+    bounded pool of reader threads plus a single writer thread, each with
+    its own connection (WAL lets reads proceed during a commit). Writes go
+    through WriteBatcher.
+
+        POST /workouts             {"date": optional, "exercises": [{"name", "unit", "sets"}]}
+        GET  /exercises?prefix=be  names and units starting with a prefix
+        GET  /exercises/<name>     unit and summary stats (aliases followed)
+        GET  /history/<name>       recent sessions, ?limit=10
+        GET  /progress/<name>      rollup buckets, ?by=week|day|month&since=&until=&limit=
+    """
+
+    def __init__(self, db_path, read_threads=SERVER_READ_THREADS, max_batch=SERVER_MAX_BATCH):
+        import threading
+        from concurrent.futures import ThreadPoolExecutor
+        
+        self.db_path = db_path
+        self._local = threading.local()
+        self.readers = ThreadPoolExecutor(read_threads)
+        self.writer = ThreadPoolExecutor(1)
+        self.max_batch = max_batch
+        self.batcher = None
+
+    def _thread_app(self):
+        app = getattr(self._local, 'app', None)
+        if app is None:
+            app = self._local.app = FitLog(self.db_path)
+        return app
+
+    def _call(self, fn, args):
+        return fn(self._thread_app(), *args)
+
+    async def read(self, fn, *args):
+        import asyncio
+        
+        return await asyncio.get_event_loop().run_in_executor(self.readers, self._call, fn, args)
+
+    async def write(self, fn, *args):
+        import asyncio
+        
+        return await asyncio.get_event_loop().run_in_executor(self.writer, self._call, fn, args)
+
+    async def handle_connection(self, reader, writer):
+        import asyncio
+        import json
+        
+        try:
+            while True:
+                request_line = await reader.readline()
+                if not request_line:
+                    break
+                headers = {}
+                while True:
+                    line = await reader.readline()
+                    if line in (b'\r\n', b'\n', b''):
+                        break
+                    key, _, value = line.decode('latin-1').partition(':')
+                    headers[key.strip().lower()] = value.strip()
+                
+                keep_alive = headers.get('connection', '').lower() != 'close'
+                try:
+                    method, target, version = request_line.decode('latin-1').split()
+                    length = int(headers.get('content-length') or 0)
+                    if length < 0:
+                        raise ValueError("negative Content-Length")
+                except ValueError:
+                    status, payload, keep_alive = 400, {'error': "malformed request"}, False
+                else:
+                    keep_alive = keep_alive and version == 'HTTP/1.1'
+                    if length > SERVER_MAX_BODY:
+                        status, payload, keep_alive = 413, {'error': "request body too large"}, False
+                    else:
+                        body = await reader.readexactly(length) if length else b''
+                        status, payload = await self.dispatch(method, target, body)
+                
+                data = json.dumps(payload).encode()
+                connection = '' if keep_alive else 'Connection: close\r\n'
+                head = (f"HTTP/1.1 {status} {HTTP_REASONS[status]}\r\n"
+                        f"Content-Type: application/json\r\nContent-Length: {len(data)}\r\n{connection}\r\n")
+                writer.write(head.encode('latin-1') + data)
+                await writer.drain()
+                if not keep_alive:
+                    break
+        except (ConnectionError, asyncio.IncompleteReadError):
+            pass
+        finally:
+            writer.close()
+
+    async def dispatch(self, method, target, body):
+        from urllib.parse import parse_qs, unquote, urlsplit
+        
+        url = urlsplit(target)
+        parts = [unquote(part) for part in url.path.strip('/').split('/')]
+        query = parse_qs(url.query)
+        try:
+            if parts == ['workouts']:
+                if method != 'POST':
+                    raise HTTPError(405, "use POST to log a workout")
+                return 201, await self.log_workout(body)
+            if method != 'GET':
+                raise HTTPError(405, f"{method} not supported here")
+            if parts == ['exercises']:
+                prefix = query.get('prefix', [''])[0]
+                limit = self._int_param(query, 'limit', COMPLETION_LIMIT)
+                return 200, {'exercises': await self.read(FitLog.find_exercises, prefix, limit)}
+            if len(parts) == 2 and parts[0] == 'exercises':
+                return 200, await self.read(_api_exercise, parts[1])
+            if len(parts) == 2 and parts[0] == 'history':
+                limit = self._int_param(query, 'limit', 10)
+                return 200, await self.read(_api_history, parts[1], limit)
+            if len(parts) == 2 and parts[0] == 'progress':
+                period = query.get('by', ['week'])[0]
+                if period not in ROLLUP_PERIODS:
+                    raise HTTPError(400, f"by must be one of: {', '.join(ROLLUP_PERIODS)}")
+                try:
+                    first_day, last_day = (day_number(parse_date(query[name][0])) if name in query else None
+                                           for name in ('since', 'until'))
+                except ValueError as e:
+                    raise HTTPError(400, str(e))
+                limit = None if first_day else self._int_param(query, 'limit', PROGRESS_BUCKETS)
+                return 200, await self.read(_api_progress, parts[1], period, first_day, last_day, limit)
+            raise HTTPError(404, f"no such endpoint: {url.path}")
+        except HTTPError as e:
+            return e.status, {'error': e.message}
+        except sqlite3.Error as e:
+            return 500, {'error': f"database error: {e}"}
+        except Exception as e:
+            # Keep the connection (and any batch it shared) answering rather than dropping it
+            return 500, {'error': f"internal error: {e!r}"}
+
+    @staticmethod
+    def _int_param(query, name, default):
+        try:
+            return max(int(query.get(name, [default])[0]), 1)
+        except ValueError:
+            raise HTTPError(400, f"{name} must be an integer")
+
+    async def log_workout(self, body):
+        import json
+        
+        try:
+            record = json.loads(body.decode('utf-8'))
+            workout_date, items = parse_workout_record(record, default_date=datetime.now().isoformat())
+        except (ValueError, KeyError, TypeError, AttributeError) as e:
+            raise HTTPError(400, f"invalid workout ({e})")
+        try:
+            exercises = await self.read(FitLog.prepare_exercises, items)
+        except ValueError as e:
+            raise HTTPError(400, str(e))
+        if not exercises:
+            raise HTTPError(400, "no exercises given")
+        await self.batcher.submit((workout_date, exercises))
+        return {'date': workout_date, 'exercises': exercises}
+
+    def serve_forever(self, host=SERVER_HOST, port=SERVER_PORT):
+        import asyncio
+        
+        loop = asyncio.new_event_loop()
+        asyncio.set_event_loop(loop)
+        # Queues bind to the current loop on Python < 3.10, so build the batcher once it exists
+        self.batcher = WriteBatcher(self, self.max_batch)
+        server = loop.run_until_complete(asyncio.start_server(self.handle_connection, host, port))
+        writer_task = loop.create_task(self.batcher.run())
+        if os.name != 'nt':
+            import signal
+            
+            # Service managers stop with SIGTERM; shut down as cleanly as on Ctrl+C
+            loop.add_signal_handler(signal.SIGTERM, loop.stop)
+        print(f"Serving {self.db_path} on http://{host}:{port} (Ctrl+C to stop)", file=sys.stderr)
+        try:
+            loop.run_forever()
+        except KeyboardInterrupt:
+            pass
+        finally:
+            server.close()
+            writer_task.cancel()
+            loop.run_until_complete(server.wait_closed())
+            self.readers.shutdown()
+            self.writer.shutdown()
+            loop.close()
+        print(f"\nSaved {self.batcher.workouts:,} workouts in {self.batcher.batches:,} commits", file=sys.stderr)
+
+
+def _api_exercise(app, name):
+    exercise_name = app.resolve_exercise_name(name)
+    unit = app.get_exercise_with_unit(exercise_name)
+    if unit is None:
+        raise HTTPError(404, f"no exercise named {exercise_name!r}")
+    row = app.storage.execute('''
+        SELECT workouts, total_sets, total_reps, total_volume, best_weight, best_reps, best_e1rm,
+               first_date, last_date
+        FROM exercise_stats WHERE name = ?
+    ''', (exercise_name,)).fetchone()
+    columns = ('workouts', 'total_sets', 'total_reps', 'total_volume', 'best_weight', 'best_reps',
+               'best_e1rm', 'first_date', 'last_date')
+    return {'name': exercise_name, 'unit': unit, 'stats': dict(zip(columns, row)) if row else None}
+
+
+def _api_history(app, name, limit):
+    exercise_name, unit, sessions = app.get_history(name, limit)
+    if unit is None:
+        raise HTTPError(404, f"no history for {exercise_name!r}")
+    return {'name': exercise_name, 'unit': unit,
+            'sessions': [{'date': workout_date, 'sets': sets} for workout_date, sets in sessions]}
+
+
+def _api_progress(app, name, period, first_day, last_day, limit):
+    exercise_name = app.resolve_exercise_name(name)
+    unit = app.get_exercise_with_unit(exercise_name)
+    if unit is None:
+        raise HTTPError(404, f"no history for {exercise_name!r}")
+    buckets = [{'start': date.fromordinal(start).isoformat(), 'sets': sets, 'reps': reps,
+                'volume': volume, 'best_e1rm': best_e1rm}
+               for start, sets, reps, volume, best_e1rm in
+               app.get_rollups(exercise_name, period, first_day, last_day, limit)]
+    return {'name': exercise_name, 'unit': unit, 'period': period, 'buckets': buckets}
+
+
+def serve_command(db_path, host=SERVER_HOST, port=SERVER_PORT, read_threads=SERVER_READ_THREADS,
+                  max_batch=SERVER_MAX_BATCH):
+    # Migrate once up front so the per-thread connections only check the version
+    FitLog(db_path).close()
+    FitLogServer(db_path, read_threads, max_batch).serve_forever(host, port)
+    return 0
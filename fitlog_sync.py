@@ -0,0 +1,277 @@
+"""
+Delta sync between databases through change files (export-changes,
+apply-changes and sync-status).
+"""
+
+import math
+import os
+import sqlite3
+import sys
+from itertools import islice
+
+from fitlog_core import (EXERCISE_UNITS, MAX_REPS, SYNC_CHUNK_WORKOUTS, SYNC_FORMAT, SYNC_FORMAT_VERSION,
+                        SYNC_NODE_ID_BYTES, UNIT_CONVERSIONS, convert_unit, get_meta, parse_date, set_meta,
+                        unpack_sets)
+
+
+def compact_integer(value):
+    # Whole floats are written as ints in change files; is_integer() is False for nan and inf
+    return isinstance(value, float) and value.is_integer()
+
+
+def open_change_file(path, mode):
+    """
+    Open a gzipped JSONL change file as text for mode 'r' or 'w'; '-' is
+    stdin or stdout.
+    """
+    import gzip
+    
+    if path == '-':
+        import io
+        
+        stream = sys.stdin.buffer if mode == 'r' else sys.stdout.buffer
+        return io.TextIOWrapper(gzip.GzipFile(fileobj=stream, mode=mode + 'b'), encoding='utf-8')
+    return gzip.open(path, mode + 't', encoding='utf-8')
+
+
+def load_workout_exercises(app, workout_ids):
+    """
+    Return {workout_id: [{'name', 'unit', 'sets': [(weight, reps), ...]}]}
+    for the given workouts, in logged order, with one query for the
+    exercises and one for their sets.
+    """
+    marks = ', '.join('?' * len(workout_ids))
+    rows = app.storage.execute(f'''
+        SELECT id, workout_id, name, unit, packed_sets FROM exercises
+        WHERE workout_id IN ({marks}) ORDER BY workout_id, id
+    ''', workout_ids).fetchall()
+    if app.storage.packed_sets:
+        exercise_sets = {exercise_id: list(zip(*unpack_sets(blob))) for exercise_id, _, _, _, blob in rows if blob}
+    else:
+        exercise_sets = {}
+        ids = [row[0] for row in rows]
+        cursor = app.storage.execute(f'''
+            SELECT exercise_id, weight, reps FROM sets
+            WHERE exercise_id IN ({', '.join('?' * len(ids))})
+            ORDER BY exercise_id, set_order
+        ''', ids)
+        for exercise_id, weight, reps in cursor:
+            exercise_sets.setdefault(exercise_id, []).append((weight, reps))
+    
+    workouts = {}
+    for exercise_id, workout_id, name, unit, _ in rows:
+        workouts.setdefault(workout_id, []).append(
+            {'name': name, 'unit': unit, 'sets': exercise_sets.get(exercise_id, [])})
+    return workouts
+
+
+def iter_changes(app, since, until, exclude_origin=None):
+    """
+    Yield change file records for change_log entries after since, up to
+    and including until, oldest first. Only the new range of the log is
+    read, so the cost follows the number of changes rather than the
+    size of the history. Entries synced from exclude_origin are left out.
+    """
+    sql = '''
+        SELECT c.seq, w.id, w.uid, w.date
+        FROM change_log c JOIN workouts w ON w.id = c.workout_id
+        WHERE c.seq > ? AND c.seq <= ?
+    '''
+    params = [since, until]
+    if exclude_origin is not None:
+        sql += ' AND (c.origin IS NULL OR c.origin != ?)'
+        params.append(exclude_origin)
+    cursor = app.storage.execute(sql + ' ORDER BY c.seq', params)
+    while True:
+        rows = cursor.fetchmany(SYNC_CHUNK_WORKOUTS)
+        if not rows:
+            return
+        exercises = load_workout_exercises(app, [row[1] for row in rows])
+        for seq, workout_id, uid, workout_date in rows:
+            yield {'seq': seq, 'uid': uid, 'date': workout_date,
+                   'exercises': [{'name': e['name'], 'unit': e['unit'],
+                                  'sets': [[int(weight) if compact_integer(weight) else weight, reps]
+                                           for weight, reps in e['sets']]}
+                                 for e in exercises.get(workout_id, [])]}
+
+
+def export_changes_command(app, path, peer=None, since=None):
+    """
+    Write the changes a peer has not yet confirmed to a gzipped JSONL
+    file: a header line, then one workout per line. Without since, the
+    peer's high-water mark decides where to start (the lowest mark of
+    all known peers if none is named). The header carries this
+    database's own marks, which is how peers learn what has arrived.
+    Returns an exit status.
+    """
+    import json
+    
+    node_id = get_meta(app.storage, 'node_id')
+    peers = dict(app.storage.execute('SELECT node_id, acked_seq FROM sync_peers').fetchall())
+    if peer is None and since is None and len(peers) == 1:
+        peer = next(iter(peers))
+    if peer is not None and peer not in peers:
+        print(f"Unknown peer {peer!r}; known peers: {', '.join(sorted(peers)) or 'none'}.", file=sys.stderr)
+        return 1
+    if since is None:
+        since = peers[peer] if peer is not None else min(peers.values(), default=0)
+    
+    until = app.storage.execute('SELECT MAX(seq) FROM change_log').fetchone()[0] or 0
+    acks = dict(app.storage.execute('SELECT node_id, received_seq FROM sync_peers').fetchall())
+    header = {'format': SYNC_FORMAT, 'version': SYNC_FORMAT_VERSION, 'origin': node_id,
+              'since': since, 'until': max(until, since), 'acks': acks}
+    count = 0
+    try:
+        with open_change_file(path, 'w') as handle:
+            handle.write(json.dumps(header, separators=(',', ':')) + '\n')
+            # A peer's own workouts are never sent back to it
+            for record in iter_changes(app, since, until, exclude_origin=peer):
+                handle.write(json.dumps(record, separators=(',', ':')) + '\n')
+                count += 1
+    except OSError as e:
+        print(f"Cannot write {path}: {e}", file=sys.stderr)
+        return 1
+    
+    target = f" for {peer}" if peer else ""
+    span = f"changes {since + 1}-{until}" if until > since else "no new changes"
+    print(f"Exported {count:,} workout(s){target} ({span}) to {path}.", file=sys.stderr)
+    return 0
+
+
+def apply_changes_command(app, path):
+    """
+    Apply a change file from another database in one transaction.
+    Changes at or below the origin's high-water mark and workouts whose
+    uid is already here are skipped, so applying a file twice is
+    harmless. A file that starts past the mark would leave a gap and is
+    refused. Returns an exit status.
+    """
+    import json
+    
+    node_id = get_meta(app.storage, 'node_id')
+    try:
+        with open_change_file(path, 'r') as handle:
+            header = json.loads(handle.readline() or 'null')
+            if not isinstance(header, dict) or header.get('format') != SYNC_FORMAT:
+                print(f"{path} is not a FitLog change file.", file=sys.stderr)
+                return 1
+            if header.get('version') != SYNC_FORMAT_VERSION:
+                print(f"{path} uses change file version {header.get('version')}, "
+                      f"this FitLog reads version {SYNC_FORMAT_VERSION}.", file=sys.stderr)
+                return 1
+            origin = header['origin']
+            if origin == node_id:
+                print(f"{path} came from this database's sync id {node_id}. If this database is a copy of "
+                      f"another, run sync-status --new-id on one of them.", file=sys.stderr)
+                return 1
+            
+            row = app.storage.execute('SELECT received_seq, acked_seq FROM sync_peers WHERE node_id = ?',
+                                       (origin,)).fetchone()
+            received, acked = row if row else (0, 0)
+            if header['since'] > received:
+                print(f"{path} starts after change {header['since']} from {origin}, but only changes up to "
+                      f"{received} have been applied here. Export again with --since {received}.",
+                      file=sys.stderr)
+                return 1
+            
+            applied = skipped = 0
+            catalog = {}
+            with app.storage.transaction():
+                records = (json.loads(line) for line in handle if line.strip())
+                while True:
+                    chunk = list(islice(records, SYNC_CHUNK_WORKOUTS))
+                    if not chunk:
+                        break
+                    chunk = [record for record in chunk if record['seq'] > received]
+                    applied_chunk, skipped_chunk = _apply_change_records(app, chunk, origin, catalog)
+                    applied += applied_chunk
+                    skipped += skipped_chunk
+                app.storage.execute('''
+                    INSERT OR REPLACE INTO sync_peers (node_id, received_seq, acked_seq) VALUES (?, ?, ?)
+                ''', (origin, max(received, header['until']), max(acked, header['acks'].get(node_id, 0))))
+    except OSError as e:
+        print(f"Cannot read {path}: {e}", file=sys.stderr)
+        return 1
+    except (ValueError, KeyError, TypeError, AttributeError) as e:
+        # The transaction rolled back; the high-water mark is unchanged
+        print(f"Malformed change file {path} ({e!r}); nothing applied.", file=sys.stderr)
+        return 1
+    except sqlite3.Error as e:
+        print(f"Database error applying changes: {e}", file=sys.stderr)
+        return 1
+    
+    print(f"Applied {applied:,} workout(s) from {origin}, skipped {skipped:,} already here "
+          f"(now at change {max(received, header['until'])}).", file=sys.stderr)
+    return 0
+
+
+def _apply_change_records(app, records, origin, catalog):
+    if not records:
+        return 0, 0
+    uids = [record['uid'] for record in records]
+    existing = {row[0] for row in app.storage.execute(
+        f'SELECT uid FROM workouts WHERE uid IN ({", ".join("?" * len(uids))})', uids)}
+    workouts = []
+    new_uids = []
+    for record in records:
+        uid = str(record['uid'])
+        if uid in existing:
+            continue
+        existing.add(uid)
+        exercises = []
+        for exercise in record['exercises']:
+            unit = exercise['unit']
+            if unit not in EXERCISE_UNITS:
+                raise ValueError(f"unknown unit {unit!r}")
+            name, local_unit = _local_exercise(app, catalog, str(exercise['name']), unit)
+            sets = []
+            for weight, reps in exercise['sets']:
+                weight, reps = float(weight), int(reps)
+                if not math.isfinite(weight) or not 0 <= reps <= MAX_REPS:
+                    raise ValueError(f"invalid set {weight} x {reps} for {name!r}")
+                sets.append((weight if local_unit == unit else convert_unit(weight, unit, local_unit), reps))
+            exercises.append({'name': name, 'unit': local_unit, 'sets': sets})
+        workouts.append((parse_date(str(record['date'])), exercises))
+        new_uids.append(uid)
+    if workouts:
+        app.write_workouts(workouts, new_uids, origin)
+    return len(workouts), len(records) - len(workouts)
+
+
+def _local_exercise(app, catalog, name, unit):
+    """
+    Where a synced exercise is stored here, as (name, unit). An exercise
+    already logged in another unit of the same kind keeps its local
+    unit and the sets are converted; one of a different kind (reps vs
+    seconds) is kept apart as "<name> <unit>". catalog caches local
+    units across the file, including exercises new to this database.
+    """
+    for candidate in (name, f'{name} {unit}'):
+        if candidate not in catalog:
+            catalog[candidate] = app.get_exercise_with_unit(candidate) or unit
+        local_unit = catalog[candidate]
+        if local_unit == unit or UNIT_CONVERSIONS.get(local_unit, (None,))[0] == UNIT_CONVERSIONS[unit][0]:
+            return candidate, local_unit
+    raise ValueError(f"{name!r} is logged here in {catalog[name]}, which {unit} cannot be converted to")
+
+
+def sync_status_command(app, new_id=False):
+    if new_id:
+        with app.storage.transaction():
+            set_meta(app.storage, 'node_id', os.urandom(SYNC_NODE_ID_BYTES).hex())
+            # Peers knew this database under its old id, so start their marks over
+            app.storage.execute('UPDATE sync_peers SET acked_seq = 0')
+    node_id = get_meta(app.storage, 'node_id')
+    head = app.storage.execute('SELECT MAX(seq) FROM change_log').fetchone()[0] or 0
+    print(f"Sync id: {node_id}")
+    print(f"Changes logged: {head:,}")
+    peers = app.storage.execute('SELECT node_id, received_seq, acked_seq FROM sync_peers ORDER BY node_id')
+    rows = peers.fetchall()
+    if not rows:
+        print("No peers yet; apply-changes records one.")
+        return 0
+    print()
+    print(f"{'Peer':<20} {'Received':>10} {'Confirmed':>10}")
+    for peer, received, acked in rows:
+        print(f"{peer:<20} {received:>10,} {acked:>10,}")
+    return 0